@@ -237,6 +237,18 @@ void init_triton_ir(py::module &&m) {
              auto loc = mlir::UnknownLoc::get(ty.getContext());
              self.addArgument(ty, loc);
            })
+      .def("add_arguments",
+           [](mlir::Block &self, std::vector<mlir::Type> &tys) {
+             for (mlir::Type ty : tys) {
+               auto loc = mlir::UnknownLoc::get(ty.getContext());
+               self.addArgument(ty, loc);
+             }
+           })
+      .def("get_arguments",
+           [](mlir::Block &self) -> std::vector<mlir::Value> {
+             return std::vector<mlir::Value>(self.args_begin(),
+                                             self.args_end());
+           })
       .def("get_num_arguments", &mlir::Block::getNumArguments)
       .def("dump", &mlir::Block::dump)
       .def("move_before", &mlir::Block::moveBefore)
@@ -267,6 +279,25 @@ void init_triton_ir(py::module &&m) {
                return false;
              });
            })
+      .def("replace_uses_in_block_with",
+           [](mlir::Block &self, std::vector<mlir::Value> &vals,
+              std::vector<mlir::Value> &newVals) {
+             if (vals.size() != newVals.size())
+               throw std::runtime_error("Mismatched number of values");
+             auto inBlock = [&](mlir::OpOperand &operand) {
+               mlir::Block *currentBlock = operand.getOwner()->getBlock();
+               while (currentBlock) {
+                 if (currentBlock == &self)
+                   return true;
+                 // Move up one level
+                 currentBlock =
+                     currentBlock->getParent()->getParentOp()->getBlock();
+               }
+               return false;
+             };
+             for (size_t i = 0; i < vals.size(); ++i)
+               vals[i].replaceUsesWithIf(newVals[i], inBlock);
+           })
       .def("__str__",
            [](mlir::Block &self) {
              std::string str;
@@ -307,6 +338,11 @@ void init_triton_ir(py::module &&m) {
            [](mlir::OpState &self, unsigned idx) -> mlir::Value {
              return self->getResult(idx);
            })
+      .def("get_results",
+           [](mlir::OpState &self) -> std::vector<mlir::Value> {
+             auto results = self->getResults();
+             return std::vector<mlir::Value>(results.begin(), results.end());
+           })
       .def(
           "get_region",
           [](mlir::OpState &self, unsigned idx) -> mlir::Region & {
@@ -0,0 +1,110 @@
+import json
+import os
+
+import pytest
+
+from triton.compiler import (CacheManager, _disk_cached_env,
+                             amdgcn_get_kernel_name, instance_descriptor,
+                             kernel_suffix, ptx_get_kernel_name)
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRITON_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def make_probe(name, values, is_valid=lambda *args: True):
+    # a fresh decorated probe stands for a fresh process: nothing is memoized in-process yet
+    calls = []
+
+    @_disk_cached_env(name, is_valid)
+    def probe(*args):
+        calls.append(args)
+        return values[len(calls) - 1]
+    return probe, calls
+
+
+def test_disk_cached_env_persists_across_processes(cache_dir):
+    probe, calls = make_probe("probe", [["a", "b"]])
+    assert probe("x") == ["a", "b"]
+    assert probe("x") == ["a", "b"]
+    assert len(calls) == 1
+    with open(os.path.join(cache_dir, "env", "probe.json")) as f:
+        assert json.load(f)["value"] == ["a", "b"]
+    probe, calls = make_probe("probe", [["c"]])
+    assert probe("x") == ["a", "b"]
+    assert calls == []
+
+
+def test_disk_cached_env_recomputes_for_other_args(cache_dir):
+    probe, _ = make_probe("probe", [["a"]])
+    probe("x")
+    probe, calls = make_probe("probe", [["b"]])
+    assert probe("y") == ["b"]
+    assert calls == [("y",)]
+
+
+def test_disk_cached_env_revalidates_on_load(cache_dir):
+    probe, _ = make_probe("probe", [["stale"]])
+    probe("x")
+    probe, calls = make_probe("probe", [["fresh"]], is_valid=lambda arg, value: value != ["stale"])
+    assert probe("x") == ["fresh"]
+    assert len(calls) == 1
+    probe, calls = make_probe("probe", [["other"]])
+    assert probe("x") == ["fresh"]
+    assert calls == []
+
+
+def test_disk_cached_env_does_not_persist_invalid_values(cache_dir):
+    probe, _ = make_probe("probe", [None], is_valid=lambda arg, value: value is not None)
+    assert probe("x") is None
+    assert not CacheManager("env").has_file("probe.json")
+
+
+def test_disk_cached_env_ignores_corrupted_entries(cache_dir):
+    probe, _ = make_probe("probe", [["a"]])
+    probe("x")
+    with open(os.path.join(cache_dir, "env", "probe.json"), "w") as f:
+        f.write("{not json")
+    probe, calls = make_probe("probe", [["b"]])
+    assert probe("x") == ["b"]
+    assert len(calls) == 1
+
+
+def test_ptx_get_kernel_name():
+    ptx = "\n".join([
+        "//",
+        "// Generated by LLVM NVPTX Back-End",
+        "//",
+        ".version 7.4",
+        ".target sm_80",
+        "",
+        "\t// .globl\tkernel_0d1d2d",
+        ".visible .entry kernel_0d1d2d(",
+    ])
+    assert ptx_get_kernel_name(ptx) == "kernel_0d1d2d"
+    assert ptx_get_kernel_name(".version 7.4\n.target sm_80\n") is None
+
+
+def test_amdgcn_get_kernel_name():
+    amdgcn = "\n".join([
+        "\t.text",
+        "\t.amdgcn_target \"amdgcn-amd-amdhsa--gfx90a\"",
+        "\t.globl\tkernel_0d1d2d",
+        "\t.p2align\t8",
+    ])
+    assert amdgcn_get_kernel_name(amdgcn) == "kernel_0d1d2d"
+    assert amdgcn_get_kernel_name("\t.text\n") is None
+
+
+@pytest.mark.parametrize("signature, divisible_by_16, equal_to_1, suffix", [
+    ([], set(), set(), ""),
+    (["*fp32", "i32", "i32"], set(), set(), "012"),
+    (["*fp32", "*fp32", "i32", "i32"], {0, 1, 2}, {3}, "0d1d2d3c"),
+    (["i32"], {0}, {0}, "0cd"),
+    ({0: "*fp16", 1: "i32"}, {0}, set(), "0d1"),
+])
+def test_kernel_suffix(signature, divisible_by_16, equal_to_1, suffix):
+    specialization = instance_descriptor(divisible_by_16=divisible_by_16, equal_to_1=equal_to_1)
+    assert kernel_suffix(signature, specialization) == suffix
@@ -1,10 +1,9 @@
 from __future__ import annotations
 
 import ast
-import contextlib
 import functools
 import hashlib
-import io
+import inspect
 import json
 import os
 import re
@@ -13,12 +12,12 @@ import subprocess
 import sys
 import sysconfig
 import tempfile
+import uuid
 import warnings
-from collections import namedtuple
+from collections import ChainMap, namedtuple
 from pathlib import Path
-from typing import Any, Callable, Dict, Optional, Tuple, Type, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
 
-import setuptools
 import torch
 from filelock import FileLock
 
@@ -27,6 +26,12 @@ import triton._C.libtriton.triton as _triton
 from . import impl
 from .tools.disasm import extract
 
+# The ast library added visit_Constant and deprecated some other
+# methods but we can't move to that without breaking Python 3.6 and 3.7.
+# Filter these once here rather than entering a `catch_warnings` context per visited node.
+warnings.filterwarnings("ignore", category=DeprecationWarning, module=__name__)  # python 3.9
+warnings.filterwarnings("ignore", category=PendingDeprecationWarning, module=__name__)  # python 3.8
+
 
 def static_vars(**kwargs):
     def decorate(func):
@@ -36,32 +41,51 @@ def static_vars(**kwargs):
     return decorate
 
 
+# signature type string => name of the corresponding `triton.language` dtype
+_str_to_ty_names = {
+    "fp8e5": "float8e5",
+    "fp8e4": "float8e4",
+    "fp16": "float16",
+    "bf16": "bfloat16",
+    "fp32": "float32",
+    "fp64": "float64",
+    "i1": "int1",
+    "i8": "int8",
+    "i16": "int16",
+    "i32": "int32",
+    "i64": "int64",
+    "u8": "uint8",
+    "u16": "uint16",
+    "u32": "uint32",
+    "u64": "uint64",
+    "B": "int1",
+}
+
+
+@functools.lru_cache(maxsize=None)
 def str_to_ty(name):
-    if name[0] == "*":
-        ty = str_to_ty(name[1:])
-        return triton.language.pointer_type(ty)
-    tys = {
-        "fp8e5": triton.language.float8e5,
-        "fp8e4": triton.language.float8e4,
-        "fp16": triton.language.float16,
-        "bf16": triton.language.bfloat16,
-        "fp32": triton.language.float32,
-        "fp64": triton.language.float64,
-        "i1": triton.language.int1,
-        "i8": triton.language.int8,
-        "i16": triton.language.int16,
-        "i32": triton.language.int32,
-        "i64": triton.language.int64,
-        "u8": triton.language.uint8,
-        "u16": triton.language.uint16,
-        "u32": triton.language.uint32,
-        "u64": triton.language.uint64,
-        "B": triton.language.int1,
-    }
-    return tys[name]
+    # each leading '*' adds one level of pointer indirection
+    scalar_name = name.lstrip('*')
+    ty = getattr(triton.language, _str_to_ty_names[scalar_name])
+    for _ in range(len(name) - len(scalar_name)):
+        ty = triton.language.pointer_type(ty)
+    return ty
+
+
+# dtype name => mangled name; the set of types seen in a process is small
+_mangled_ty_cache: Dict[str, str] = {}
 
 
 def mangle_ty(ty):
+    # `name` uniquely identifies scalar, pointer and block types
+    mangled = _mangled_ty_cache.get(ty.name)
+    if mangled is None:
+        mangled = _mangle_ty(ty)
+        _mangled_ty_cache[ty.name] = mangled
+    return mangled
+
+
+def _mangle_ty(ty):
     if ty.is_ptr():
         return 'P' + mangle_ty(ty.element_ty)
     if ty.is_int():
@@ -87,12 +111,14 @@ def mangle_ty(ty):
     assert False, "Unsupported type"
 
 
+_mangled_constants_table = str.maketrans({'.': '_d_', "'": '_sq_'})
+
+
 def mangle_fn(name, arg_tys, constants):
     # doesn't mangle ret type, which must be a function of arg tys
     mangled_arg_names = '_'.join([mangle_ty(ty) for ty in arg_tys])
     mangled_constants = '_'.join([f'{i}c{repr(constants[i])}' for i in sorted(constants)])
-    mangled_constants = mangled_constants.replace('.', '_d_')
-    mangled_constants = mangled_constants.replace("'", '_sq_')
+    mangled_constants = mangled_constants.translate(_mangled_constants_table)
     ret = f'{name}__{mangled_arg_names}__{mangled_constants}'
     return ret
 
@@ -102,14 +128,68 @@ def _is_triton_tensor(o: Any) -> bool:
 
 
 def _is_constexpr(o: Any) -> bool:
-    return isinstance(o, triton.language.constexpr)  # TODO: fetch triton.language.constexpr to a global after circular imports untangled, saving getattr
+    return isinstance(o, triton.language.constexpr)
+
+
+def _is_jit_function(o: Any) -> bool:
+    return isinstance(o, triton.runtime.JITFunction)
+
+
+_device_assert = None  # `triton.language.core.device_assert`, bound by `_bind_language_types`
+
+_is_builtin = impl.is_builtin
+
+
+def _bind_language_types():
+    # TODO: this needs to be done at module level when cyclic imports untangled and `triton.language` can be imported at module level
+    # rebind the predicates above to C-level instance checks, saving a Python frame and two getattr per call
+    global _is_triton_tensor, _is_constexpr, _is_jit_function, _device_assert
+    _is_triton_tensor = triton.language.tensor.__instancecheck__
+    _is_constexpr = triton.language.constexpr.__instancecheck__
+    _is_jit_function = triton.runtime.JITFunction.__instancecheck__
+    _device_assert = triton.language.core.device_assert
 
 
 def _unwrap_if_constexpr(o: Any):
-    return o.value if isinstance(o, triton.language.constexpr) else o
+    return o.value if _is_constexpr(o) else o
+
+
+def _assigned_names(stmts: List[ast.stmt]) -> List[str]:
+    # names bound anywhere in `stmts` (assignments, loop targets, ...), in order of appearance
+    names = {}
+    for stmt in stmts:
+        for node in ast.walk(stmt):
+            if isinstance(node, ast.Name) and type(node.ctx) is ast.Store:
+                names[node.id] = None
+    return list(names)
+
 
+@functools.lru_cache(maxsize=None)
+def _signature_of(fn: Callable) -> inspect.Signature:
+    return inspect.signature(fn)
 
-_condition_types = {bool, int, type(None)}  # Python types accepted for conditionals inside kernels
+
+_absent = object()  # marker for names missing from a scope
+
+_condition_types = (bool, int, type(None))  # Python types accepted for conditionals inside kernels
+
+# AST operator types => names of the methods implementing them
+_method_name_for_bin_op: Dict[Type[ast.operator], str] = {
+    ast.Add: '__add__', ast.Sub: '__sub__', ast.Mult: '__mul__', ast.Div: '__truediv__',
+    ast.FloorDiv: '__floordiv__', ast.Mod: '__mod__', ast.Pow: '__pow__',
+    ast.LShift: '__lshift__', ast.RShift: '__rshift__', ast.BitAnd: '__and__', ast.BitOr: '__or__', ast.BitXor: '__xor__',
+}
+_method_name_for_comp_op: Dict[Type[ast.cmpop], str] = {
+    ast.Eq: '__eq__', ast.NotEq: '__ne__', ast.Lt: '__lt__', ast.LtE: '__le__', ast.Gt: '__gt__', ast.GtE: '__ge__'
+}
+_method_name_for_unary_op: Dict[Type[ast.unaryop], str] = {ast.USub: '__neg__', ast.UAdd: '__pos__', ast.Not: '__not__', ast.Invert: '__invert__'}
+_method_name_for_bool_op: Dict[Type[ast.boolop], str] = {ast.And: 'logical_and', ast.Or: 'logical_or'}
+# binary method names => their reflected counterparts, e.g. `__add__` => `__radd__`
+_reverse_method_name: Dict[str, str] = {
+    **{name: f"__r{name[2:]}" for name in (*_method_name_for_bin_op.values(), *_method_name_for_comp_op.values())},
+    # `logical_and`/`logical_or` are symmetric and have no reflected variant
+    **{name: name for name in _method_name_for_bool_op.values()},
+}
 
 
 class enter_sub_region:
@@ -118,12 +198,15 @@ class enter_sub_region:
 
     def __enter__(self):
         # record lscope & local_defs in the parent scope
-        self.liveins = self.generator.lscope.copy()
-        self.prev_defs = self.generator.local_defs.copy()
+        # names defined in the region go to a new scope layer, so the parent
+        # scope is left untouched and doesn't need to be copied
+        self.liveins = self.generator.lscope
+        self.prev_defs = self.generator.local_defs
+        self.generator.lscope = self.liveins.new_child()
         self.generator.local_defs = {}
         self.insert_block = self.generator.builder.get_insertion_block()
         self.insert_point = self.generator.builder.get_insertion_point()
-        return self.liveins, self.insert_block
+        return self.liveins, self.insert_block, self.insert_point
 
     def __exit__(self, *args, **kwargs):
         self.generator.builder.restore_insertion_point(self.insert_point)
@@ -131,7 +214,31 @@ class enter_sub_region:
         self.generator.local_defs = self.prev_defs
 
 
+def _build_visit_dispatch(cls) -> Dict[type, Callable]:
+    # map AST node types to the `visit_<NodeType>` methods defined on `cls`,
+    # so `visit` can dispatch on `type(node)` without building a method name per node
+    dispatch = {}
+    with warnings.catch_warnings():
+        # some `ast` node classes (e.g. `ast.Num`) are deprecated aliases
+        warnings.simplefilter("ignore", DeprecationWarning)
+        for attr in dir(cls):
+            if not attr.startswith('visit_'):
+                continue
+            node_name = attr[len('visit_'):]
+            if node_name == 'NoneType':
+                dispatch[type(None)] = getattr(cls, attr)
+                continue
+            node_type = getattr(ast, node_name, None)
+            if isinstance(node_type, type) and issubclass(node_type, ast.AST):
+                dispatch[node_type] = getattr(cls, attr)
+    return dispatch
+
+
 class CodeGenerator(ast.NodeVisitor):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._visit_dispatch = _build_visit_dispatch(cls)
+
     def __init__(self, context, prototype, gscope, attributes, constants, function_name,
                  module=None, is_kernel=False, function_types: Optional[Dict] = None, debug=False):
         self.builder = _triton.ir.builder(context)
@@ -139,7 +246,7 @@ class CodeGenerator(ast.NodeVisitor):
         self.function_ret_types = {} if function_types is None else function_types
         self.prototype = prototype
         self.gscope = gscope
-        self.lscope = dict()
+        self.lscope = ChainMap()
         self.attributes = attributes
         self.constants = constants
         self.function_name = function_name
@@ -151,11 +258,14 @@ class CodeGenerator(ast.NodeVisitor):
         # name => triton.language.tensor
         self.local_defs: Dict[str, triton.language.tensor] = {}
         self.global_uses: Dict[str, triton.language.tensor] = {}
-        self.dereference_name: Callable[[str], Any] = self._define_name_lookup()
+        self._define_builtins()
+        # AST node / JITFunction => whether it (transitively) contains a return
+        self.contains_return_op_cache: Dict[Any, bool] = {}
 
     builtin_namespace: Dict[str, Any] = {_.__name__: _ for _ in (range, float, int, isinstance, getattr)}
 
-    def _define_name_lookup(self):
+    def _define_builtins(self):
+        _bind_language_types()
         # TODO: this needs to be moved to class scope when cyclic imports untangled and `triton.language` can be imported at module level
         self.builtin_namespace.update((
             ('print', triton.language.core.device_print),
@@ -167,24 +277,21 @@ class CodeGenerator(ast.NodeVisitor):
             (triton.language.core.static_print, CodeGenerator.execute_static_print),
         ))
 
-        def local_lookup(name: str, absent):
-            value = self.lscope.get(name, absent)  # this needs to be re-fetched from `self` every time, because it gets switched occasionally
-            if value is not absent and name not in self.local_defs:
-                self.global_uses[name] = value
+    def dereference_name(self, name: str) -> Any:
+        # walk the local scope layers directly, `ChainMap.get` is comparatively slow
+        for scope in self.lscope.maps:
+            value = scope.get(name, _absent)
+            if value is not _absent:
+                if name not in self.local_defs:
+                    self.global_uses[name] = value
+                return value
+        value = self.gscope.get(name, _absent)
+        if value is not _absent:
             return value
-
-        absent_marker = object()
-
-        def name_lookup(name: str) -> Any:
-            lookup_order = local_lookup, self.gscope.get, self.builtin_namespace.get
-            absent = absent_marker
-            for lookup_function in lookup_order:
-                value = lookup_function(name, absent)
-                if value is not absent:
-                    return value
-            raise NameError(f'{name} is not defined')
-
-        return name_lookup
+        value = self.builtin_namespace.get(name, _absent)
+        if value is not _absent:
+            return value
+        raise NameError(f'{name} is not defined')
 
     def set_value(self, name: str,
                   value: Union[triton.language.tensor, triton.language.constexpr]) -> None:
@@ -200,41 +307,72 @@ class CodeGenerator(ast.NodeVisitor):
     # AST visitor
     #
     def visit_compound_statement(self, stmts):
+        # statements following a `return` are dead and are not visited;
+        # `last_ret_type` is the value of the last statement visited
+        visit = self.visit
+        ret_type = None
+        has_ret = False
         for stmt in stmts:
-            self.last_ret_type = self.visit(stmt)
-            if isinstance(stmt, ast.Return):
+            ret_type = visit(stmt)
+            if type(stmt) is ast.Return:
+                has_ret = True
                 break
-        return stmts and isinstance(stmt, ast.Return)
+        if stmts:
+            self.last_ret_type = ret_type
+        return has_ret
 
     # TODO: should be its own AST visitor
     def contains_return_op(self, node):
-        if isinstance(node, ast.Return):
-            return True
-        elif isinstance(node, ast.Assign):
-            return self.contains_return_op(node.value)
-        elif isinstance(node, ast.Module):
-            pred = lambda s: self.contains_return_op(s)
-            return any(pred(s) for s in node.body)
-        elif isinstance(node, ast.FunctionDef):
-            pred = lambda s: self.contains_return_op(s)
-            return any(pred(s) for s in node.body)
-        elif isinstance(node, ast.Call):
-            fn = self.visit(node.func)
-            if isinstance(fn, triton.JITFunction):
-                old_gscope = self.gscope
-                self.gscope = sys.modules[fn.fn.__module__].__dict__
-                ret = self.contains_return_op(fn.parse())
-                self.gscope = old_gscope
-                return ret
-            return False
-        elif isinstance(node, ast.If):
-            pred = lambda s: self.contains_return_op(s)
-            ret = any(pred(s) for s in node.body)
-            if node.orelse:
-                ret = ret or any(pred(s) for s in node.orelse)
-            return ret
-        else:
+        # memoized per node (and per callee JITFunction), so that nested `if`s and
+        # helpers called from many branches are only walked once per generator
+        ret = self.contains_return_op_cache.get(node)
+        if ret is None:
+            ret = self._contains_return_op(node)
+            self.contains_return_op_cache[node] = ret
+        return ret
+
+    def _contains_return_op(self, node):
+        # iterative walk over the statements that end up in the enclosing block:
+        # bodies of modules, functions and `if`s, and JIT functions called in assignments.
+        # A walk that finds no return has seen every block nested in `node`, so all of
+        # them are memoized as return-free and a later query on an inner `if` is O(1)
+        cache = self.contains_return_op_cache
+        stack = [node]
+        blocks = []
+        while stack:
+            node = stack.pop()
+            cached = cache.get(node)
+            if cached is not None:
+                if cached:
+                    return True
+            elif isinstance(node, ast.Return):
+                return True
+            elif isinstance(node, (ast.Module, ast.FunctionDef)):
+                blocks.append(node)
+                stack.extend(node.body)
+            elif isinstance(node, ast.If):
+                blocks.append(node)
+                stack.extend(node.body)
+                stack.extend(node.orelse)
+            elif isinstance(node, ast.Assign) and isinstance(node.value, ast.Call):
+                if self._callee_contains_return_op(node.value):
+                    return True
+        for block in blocks:
+            cache[block] = False
+        return False
+
+    def _callee_contains_return_op(self, node: ast.Call):
+        fn = self.visit(node.func)
+        if not isinstance(fn, triton.JITFunction):
             return False
+        ret = self.contains_return_op_cache.get(fn)
+        if ret is None:
+            old_gscope = self.gscope
+            self.gscope = sys.modules[fn.fn.__module__].__dict__
+            ret = self.contains_return_op(fn.parse())
+            self.gscope = old_gscope
+            self.contains_return_op_cache[fn] = ret
+        return ret
 
     def visit_Module(self, node):
         ast.NodeVisitor.generic_visit(self, node)
@@ -252,17 +390,18 @@ class CodeGenerator(ast.NodeVisitor):
         # post_ret_block = self.builder.create_block()
         # self.builder.create_branch(ret_block)
         # self.builder.set_insertion_point_to_end(ret_block)
+        builder = self.builder
         if ret_value is None:
-            self.builder.ret([])
+            builder.ret([])
             ret_ty = None
         elif isinstance(ret_value, tuple):
-            ret_values = [triton.language.core._to_tensor(v, self.builder) for v in ret_value]
-            ret_types = [v.type for v in ret_values]
-            self.builder.ret([v.handle for v in ret_values])
-            ret_ty = tuple(ret_types)
+            to_tensor = triton.language.core._to_tensor
+            ret_values = [to_tensor(v, builder) for v in ret_value]
+            builder.ret([v.handle for v in ret_values])
+            ret_ty = tuple(v.type for v in ret_values)
         else:
-            ret = triton.language.core._to_tensor(ret_value, self.builder)
-            self.builder.ret([ret.handle])
+            ret = triton.language.core._to_tensor(ret_value, builder)
+            builder.ret([ret.handle])
             ret_ty = ret.type
         # self.builder.create_branch(post_ret_block)
         # self.builder.set_insertion_point_to_end(post_ret_block)
@@ -329,7 +468,7 @@ class CodeGenerator(ast.NodeVisitor):
         return arg_names, kwarg_names
 
     def visit_arg(self, node):
-        ast.NodeVisitor.generic_visit(self, node)
+        # annotations are read from the signature by the JIT, not lowered
         return node.arg
 
     def visit_AnnAssign(self, node):
@@ -362,12 +501,14 @@ class CodeGenerator(ast.NodeVisitor):
         if not isinstance(values, tuple):
             values = [values]
         native_nontensor_types = (triton.language.dtype, )
+        to_tensor = triton.language.core._to_tensor
+        builder = self.builder
         for name, value in zip(names, values):
             # by default, constexpr are assigned into python variable
             value = _unwrap_if_constexpr(value)
             if not _is_triton_tensor(value) and \
                not isinstance(value, native_nontensor_types):
-                value = triton.language.core._to_tensor(value, self.builder)
+                value = to_tensor(value, builder)
             self.set_value(name, value)
 
     def visit_AugAssign(self, node):
@@ -379,15 +520,15 @@ class CodeGenerator(ast.NodeVisitor):
         return self.dereference_name(name)
 
     def visit_Name(self, node):
-        if type(node.ctx) == ast.Store:
+        if type(node.ctx) is ast.Store:
             return node.id
         return self.dereference_name(node.id)
 
     def visit_Store(self, node):
-        ast.NodeVisitor.generic_visit(self, node)
+        return None
 
     def visit_Load(self, node):
-        ast.NodeVisitor.generic_visit(self, node)
+        return None
 
     def visit_Tuple(self, node):
         args = [self.visit(x) for x in node.elts]
@@ -398,22 +539,17 @@ class CodeGenerator(ast.NodeVisitor):
         if _is_triton_tensor(lhs):
             return getattr(lhs, method_name)(rhs, _builder=self.builder)
         if _is_triton_tensor(rhs):
-            reverse_method_name = re.sub(r"__(.*)__", r"__r\1__", method_name)
-            return getattr(rhs, reverse_method_name)(lhs, _builder=self.builder)
+            return getattr(rhs, _reverse_method_name[method_name])(lhs, _builder=self.builder)
         return getattr(lhs, method_name)(rhs)
 
     def visit_BinOp(self, node):
-        lhs = self.visit(node.left)
-        rhs = self.visit(node.right)
-        method_name = self._method_name_for_bin_op.get(type(node.op))
+        visit = self.visit
+        lhs = visit(node.left)
+        rhs = visit(node.right)
+        method_name = _method_name_for_bin_op.get(type(node.op))
         if method_name is None:
             raise UnsupportedLanguageConstruct(None, node, "AST binary operator '{}' is not (currently) implemented.".format(node.op.__name__))
         return self._apply_binary_method(method_name, lhs, rhs)
-    _method_name_for_bin_op: Dict[Type[ast.operator], str] = {
-        ast.Add: '__add__', ast.Sub: '__sub__', ast.Mult: '__mul__', ast.Div: '__truediv__',
-        ast.FloorDiv: '__floordiv__', ast.Mod: '__mod__', ast.Pow: '__pow__',
-        ast.LShift: '__lshift__', ast.RShift: '__rshift__', ast.BitAnd: '__and__', ast.BitOr: '__or__', ast.BitXor: '__xor__',
-    }
 
     def visit_then_else_blocks(self, node, liveins, then_block, else_block):
         # then block
@@ -425,7 +561,7 @@ class CodeGenerator(ast.NodeVisitor):
         else_defs = {}
         if node.orelse:
             self.builder.set_insertion_point_to_start(else_block)
-            self.lscope = liveins.copy()
+            self.lscope = liveins.new_child()
             self.local_defs = {}
             self.visit_compound_statement(node.orelse)
             else_defs = self.local_defs.copy()
@@ -435,43 +571,43 @@ class CodeGenerator(ast.NodeVisitor):
         names = []
         ret_types = []
         ir_ret_types = []
-        # variables in livein whose value is updated in `if`
-        for name in liveins:
-            # check type
-            for defs, block_name in [(then_defs, 'then'), (else_defs, 'else')]:
-                if name in defs:
-                    assert defs[name].type == liveins[name].type,\
-                        f'initial value for `{name}` is of type {liveins[name].type}, '\
-                        f'but the {block_name} block redefines it as {defs[name].type}'
-            if name in then_defs or name in else_defs:
-                names.append(name)
-                ret_types.append(then_defs[name].type if name in then_defs else else_defs[name].type)
-                ir_ret_types.append(then_defs[name].handle.get_type() if name in then_defs else else_defs[name].handle.get_type())
-            # variable defined in then but not in else
-            if name in then_defs and name not in else_defs:
-                else_defs[name] = liveins[name]
-            # variable defined in else but not in then
-            if name in else_defs and name not in then_defs:
-                then_defs[name] = liveins[name]
-        # variables that are both in then and else but not in liveins
-        # TODO: could probably be cleaned up
-        for name in then_defs.keys() & else_defs.keys():
-            if name in names:
+        # single pass over the names defined in either block, collecting
+        # - variables in livein whose value is updated in `if`
+        # - variables that are both in then and else but not in liveins
+        for name in [*then_defs, *(n for n in else_defs if n not in then_defs)]:
+            in_then = name in then_defs
+            in_else = name in else_defs
+            defining = then_defs[name] if in_then else else_defs[name]
+            if name in liveins:
+                livein = liveins[name]
+                # check type
+                for defs, block_name in [(then_defs, 'then'), (else_defs, 'else')]:
+                    if name in defs:
+                        assert defs[name].type == livein.type,\
+                            f'initial value for `{name}` is of type {livein.type}, '\
+                            f'but the {block_name} block redefines it as {defs[name].type}'
+                # variable defined in only one block keeps its initial value in the other
+                if not in_else:
+                    else_defs[name] = livein
+                if not in_then:
+                    then_defs[name] = livein
+            elif in_then and in_else:
+                then_ty = then_defs[name].type
+                else_ty = else_defs[name].type
+                assert then_ty == else_ty,\
+                    f'mismatched type for {name} between then block ({then_ty}) '\
+                    f'and else block ({else_ty})'
+            else:
                 continue
-            then_ty = then_defs[name].type
-            else_ty = else_defs[name].type
-            assert then_ty == else_ty,\
-                f'mismatched type for {name} between then block ({then_ty}) '\
-                f'and else block ({else_ty})'
             names.append(name)
-            ret_types.append(then_ty)
-            ir_ret_types.append(then_defs[name].handle.get_type())
+            ret_types.append(defining.type)
+            ir_ret_types.append(defining.handle.get_type())
 
         return then_defs, else_defs, then_block, else_block, names, ret_types, ir_ret_types
 
     def visit_if_top_level(self, cond, node):
         with enter_sub_region(self) as sr:
-            liveins, ip_block = sr
+            liveins, ip_block, _ = sr
             then_block = self.builder.create_block()
             else_block = self.builder.create_block()
             # create basic-block after conditional
@@ -483,27 +619,24 @@ class CodeGenerator(ast.NodeVisitor):
             then_defs, else_defs, then_block, else_block, names, ret_types, ir_ret_types = \
                 self.visit_then_else_blocks(node, liveins, then_block, else_block)
             # then terminator
-            self.builder.set_insertion_point_to_end(then_block)
             if not then_block.has_terminator():
+                self.builder.set_insertion_point_to_end(then_block)
                 self.builder.create_branch(endif_block, [then_defs[n].handle for n in names])
             # else terminator
-            self.builder.set_insertion_point_to_end(else_block)
             if not else_block.has_terminator():
+                self.builder.set_insertion_point_to_end(else_block)
                 self.builder.create_branch(endif_block, [else_defs[n].handle for n in names])
-            for ty in ir_ret_types:
-                endif_block.add_argument(ty)
+            endif_block.add_arguments(ir_ret_types)
         # change block
         self.builder.set_insertion_point_to_start(endif_block)
         # update value
-        for i, name in enumerate(names):
-            new_tensor = triton.language.core.tensor(endif_block.arg(i), ret_types[i])
-            self.set_value(name, new_tensor)
+        for name, arg, ty in zip(names, endif_block.get_arguments(), ret_types):
+            self.set_value(name, triton.language.core.tensor(arg, ty))
 
     # TODO: refactor
     def visit_if_scf(self, cond, node):
         with enter_sub_region(self) as sr:
-            liveins, _ = sr
-            ip = self.builder.get_insertion_point()
+            liveins, _, ip = sr
             then_block = self.builder.create_block()
             else_block = self.builder.create_block() if node.orelse else None
             then_defs, else_defs, then_block, else_block, names, ret_types, _ = \
@@ -511,21 +644,21 @@ class CodeGenerator(ast.NodeVisitor):
             # create if op
             self.builder.restore_insertion_point(ip)
             if_op = self.builder.create_if_op([ty.to_ir(self.builder) for ty in ret_types], cond.handle, True)
-            then_block.merge_block_before(if_op.get_then_block())
-            self.builder.set_insertion_point_to_end(if_op.get_then_block())
+            if_then_block = if_op.get_then_block()
+            if_else_block = if_op.get_else_block()
+            then_block.merge_block_before(if_then_block)
+            if node.orelse:
+                else_block.merge_block_before(if_else_block)
+            # the insertion point is restored when leaving the sub-region,
+            # so it only needs to be moved to emit the yields
             if len(names) > 0:
+                self.builder.set_insertion_point_to_end(if_then_block)
                 self.builder.create_yield_op([then_defs[n].handle for n in names])
-            if not node.orelse:
-                else_block = if_op.get_else_block()
-            else:
-                else_block.merge_block_before(if_op.get_else_block())
-            self.builder.set_insertion_point_to_end(if_op.get_else_block())
-            if len(names) > 0:
+                self.builder.set_insertion_point_to_end(if_else_block)
                 self.builder.create_yield_op([else_defs[n].handle for n in names])
         # update values
-        for i, name in enumerate(names):
-            new_tensor = triton.language.core.tensor(if_op.get_result(i), ret_types[i])
-            self.set_value(name, new_tensor)
+        for name, result, ty in zip(names, if_op.get_results(), ret_types):
+            self.set_value(name, triton.language.core.tensor(result, ty))
 
     def visit_If(self, node):
         cond = self.visit(node.test)
@@ -537,10 +670,12 @@ class CodeGenerator(ast.NodeVisitor):
                 self.visit_if_top_level(cond, node)
         else:
             cond = _unwrap_if_constexpr(cond)
-            if type(cond) not in _condition_types:  # not isinstance - we insist the real thing, no subclasses and no ducks
+            cond_type = type(cond)
+            # not isinstance - we insist the real thing, no subclasses and no ducks
+            if not (cond_type is bool or cond_type is int or cond is None):
                 raise UnsupportedLanguageConstruct(
                     None, node, "`if` conditionals can only accept values of type {{{}}}, not objects of type {}".format(
-                        ', '.join(_.__name__ for _ in _condition_types), type(cond).__name__))
+                        ', '.join(_.__name__ for _ in _condition_types), cond_type.__name__))
             if cond:
                 self.visit_compound_statement(node.body)
             else:
@@ -561,31 +696,28 @@ class CodeGenerator(ast.NodeVisitor):
             raise UnsupportedLanguageConstruct(None, node, "simultaneous multiple comparison is not supported")
         lhs = _unwrap_if_constexpr(self.visit(node.left))
         rhs = _unwrap_if_constexpr(self.visit(node.comparators[0]))
-        if type(node.ops[0]) == ast.Is:
+        op_type = type(node.ops[0])
+        if op_type is ast.Is:
             return triton.language.constexpr(lhs is rhs)
-        if type(node.ops[0]) == ast.IsNot:
+        if op_type is ast.IsNot:
             return triton.language.constexpr(lhs is not rhs)
-        method_name = self._method_name_for_comp_op.get(type(node.ops[0]))
+        method_name = _method_name_for_comp_op.get(op_type)
         if method_name is None:
             raise UnsupportedLanguageConstruct(None, node, "AST comparison operator '{}' is not (currently) implemented.".format(node.ops[0].__name__))
         return self._apply_binary_method(method_name, lhs, rhs)
-    _method_name_for_comp_op: Dict[Type[ast.cmpop], str] = {
-        ast.Eq: '__eq__', ast.NotEq: '__ne__', ast.Lt: '__lt__', ast.LtE: '__le__', ast.Gt: '__gt__', ast.GtE: '__ge__'
-    }
 
     def visit_UnaryOp(self, node):
         op = self.visit(node.operand)
-        fn = self._method_name_for_unary_op.get(type(node.op))
+        fn = _method_name_for_unary_op.get(type(node.op))
         if fn is None:
             raise UnsupportedLanguageConstruct(None, node, "AST unary operator '{}' is not (currently) implemented.".format(node.op.__name__))
         if _is_triton_tensor(op):
             return getattr(op, fn)(_builder=self.builder)
         return getattr(op, fn)()
-    _method_name_for_unary_op: Dict[Type[ast.unaryop], str] = {ast.USub: '__neg__', ast.UAdd: '__pos__', ast.Not: '__not__', ast.Invert: '__invert__'}
 
     def visit_While(self, node):
         with enter_sub_region(self) as sr:
-            liveins, insert_block = sr
+            liveins, insert_block, _ = sr
 
             # loop body (the after region)
             # loop_block = self.builder.create_block()
@@ -612,27 +744,27 @@ class CodeGenerator(ast.NodeVisitor):
                     init_args.append(liveins[name])
 
             self.builder.set_insertion_point_to_end(insert_block)
-            while_op = self.builder.create_while_op([ty.to_ir(self.builder) for ty in ret_types],
-                                                    [arg.handle for arg in init_args])
+            ir_ret_types = [ty.to_ir(self.builder) for ty in ret_types]
+            while_op = self.builder.create_while_op(ir_ret_types, [arg.handle for arg in init_args])
             # merge the condition region
-            before_block = self.builder.create_block_with_parent(while_op.get_before(),
-                                                                 [ty.to_ir(self.builder) for ty in ret_types])
+            before_block = self.builder.create_block_with_parent(while_op.get_before(), ir_ret_types)
             self.builder.set_insertion_point_to_start(before_block)
-            for i, name in enumerate(names):
-                self.lscope[name] = triton.language.core.tensor(before_block.arg(i), ret_types[i])
+            before_args = before_block.get_arguments()
+            for name, arg, ty in zip(names, before_args, ret_types):
+                self.lscope[name] = triton.language.core.tensor(arg, ty)
                 self.local_defs[name] = self.lscope[name]
             cond = self.visit(node.test)
             self.builder.set_insertion_point_to_end(before_block)
             # create ConditionOp: e.g., scf.condition(%cond) %arg0, %arg1, ...
-            self.builder.create_condition_op(cond.handle, [before_block.arg(i) for i in range(len(init_args))])
+            self.builder.create_condition_op(cond.handle, before_args)
             # merge the loop body
-            after_block = self.builder.create_block_with_parent(while_op.get_after(),
-                                                                [ty.to_ir(self.builder) for ty in ret_types])
+            after_block = self.builder.create_block_with_parent(while_op.get_after(), ir_ret_types)
 
             # generate loop body
             self.builder.set_insertion_point_to_start(after_block)
-            for i, name in enumerate(names):
-                self.lscope[name] = triton.language.core.tensor(after_block.arg(i), ret_types[i])
+            after_args = after_block.get_arguments()
+            for name, arg, ty in zip(names, after_args, ret_types):
+                self.lscope[name] = triton.language.core.tensor(arg, ty)
                 self.local_defs[name] = self.lscope[name]
             self.scf_stack.append(node)
             self.visit_compound_statement(node.body)
@@ -645,12 +777,11 @@ class CodeGenerator(ast.NodeVisitor):
             self.builder.create_yield_op([y.handle for y in yields])
 
         # update global uses in while_op
-        for i, name in enumerate(names):
-            after_block.replace_use_in_block_with(init_args[i].handle, after_block.arg(i))
+        after_block.replace_uses_in_block_with([arg.handle for arg in init_args], after_args)
 
         # WhileOp defines new values, update the symbol table (lscope, local_defs)
-        for i, name in enumerate(names):
-            new_def = triton.language.core.tensor(while_op.get_result(i), ret_types[i])
+        for name, result, ty in zip(names, while_op.get_results(), ret_types):
+            new_def = triton.language.core.tensor(result, ty)
             self.lscope[name] = new_def
             self.local_defs[name] = new_def
 
@@ -708,81 +839,61 @@ class CodeGenerator(ast.NodeVisitor):
         iv_ir_type = iv_type.to_ir(self.builder)
         iv_is_signed = iv_type.int_signedness == triton.language.core.dtype.SIGNEDNESS.SIGNED
         # lb/ub/step might be constexpr, we need to cast them to tensor
-        lb = lb.handle
-        ub = ub.handle
-        step = step.handle
-        # ForOp can only accept IndexType as lb/ub/step. Cast integer to Index
-        lb = self.builder.create_int_cast(lb, iv_ir_type, iv_is_signed)
-        ub = self.builder.create_int_cast(ub, iv_ir_type, iv_is_signed)
-        step = self.builder.create_int_cast(step, iv_ir_type, iv_is_signed)
-        # Create placeholder for the loop induction variable
-        iv = self.builder.create_undef(iv_ir_type)
-        self.set_value(node.target.id, triton.language.core.tensor(iv, iv_type))
+        # ForOp requires lb/ub/step to have the same type, cast those that don't already have it
+        lb, ub, step = [bound.handle if bound.dtype == iv_type else
+                        self.builder.create_int_cast(bound.handle, iv_ir_type, iv_is_signed)
+                        for bound in (lb, ub, step)]
 
         with enter_sub_region(self) as sr:
-            liveins, insert_block = sr
-            ip = self.builder.get_insertion_point()
-
-            # create loop body block
-            block = self.builder.create_block()
-            self.builder.set_insertion_point_to_start(block)
-            # dry visit loop body
-            self.scf_stack.append(node)
-            self.visit_compound_statement(node.body)
-            self.scf_stack.pop()
-            block.erase()
+            liveins, _, ip = sr
 
             # If a variable (name) is defined in both its parent & itself, then it's
             # a loop-carried variable. (They must be of the same type)
-            init_args = []
-            yields = []
-            names = []
-            for name in self.local_defs:
-                if name in liveins:
-                    assert _is_triton_tensor(self.local_defs[name]), f'{name} is not tensor'
-                    assert _is_triton_tensor(liveins[name])
-                    assert self.local_defs[name].type == liveins[name].type,\
-                        f'Loop-carried variable {name} has initial type {liveins[name].type} '\
-                        f'but is re-assigned to {self.local_defs[name].type} in loop! '\
-                        f'Please make sure that the type stays consistent.'
-
-                    names.append(name)
-                    init_args.append(triton.language.core._to_tensor(liveins[name], self.builder))
-                    yields.append(triton.language.core._to_tensor(self.local_defs[name], self.builder))
+            # The candidates are found syntactically, so that the body is only visited once:
+            # a tensor assigned anywhere in the body is carried, and its type is the initial one
+            redefined = [name for name in _assigned_names(node.body) if name in liveins]
+            names = [name for name in redefined if _is_triton_tensor(liveins[name])]
+            init_args = [liveins[name] for name in names]
 
             # create ForOp
             self.builder.restore_insertion_point(ip)
             for_op = self.builder.create_for_op(lb, ub, step, [arg.handle for arg in init_args])
+            for_op_body = for_op.get_body(0)
 
             self.scf_stack.append(node)
-            self.builder.set_insertion_point_to_start(for_op.get_body(0))
-            for i, name in enumerate(names):
-                self.set_value(name, triton.language.core.tensor(for_op.get_body(0).arg(i + 1), yields[i].type))
+            self.builder.set_insertion_point_to_start(for_op_body)
+            # bind the induction variable, with its actual value for negative steps
+            iv = for_op.get_induction_var()
+            if negative_step:
+                iv = self.builder.create_sub(ub, iv)
+                iv = self.builder.create_add(iv, lb)
+            self.set_value(node.target.id, triton.language.core.tensor(iv, iv_type))
+            # the first block argument is the induction variable
+            for name, arg, init_arg in zip(names, for_op_body.get_arguments()[1:], init_args):
+                self.set_value(name, triton.language.core.tensor(arg, init_arg.type))
             self.visit_compound_statement(node.body)
             self.scf_stack.pop()
-            yields = []
-            for name in self.local_defs:
-                if name in liveins:
-                    yields.append(triton.language.core._to_tensor(self.local_defs[name], self.builder))
+
+            # only names bound in the body can have been redefined, no need to walk all of `local_defs`
+            for name in redefined:
+                if name in self.local_defs:
+                    assert _is_triton_tensor(self.local_defs[name]), f'{name} is not tensor'
+                    assert _is_triton_tensor(liveins[name])
+                    assert self.local_defs[name].type == liveins[name].type,\
+                        f'Loop-carried variable {name} has initial type {liveins[name].type} '\
+                        f'but is re-assigned to {self.local_defs[name].type} in loop! '\
+                        f'Please make sure that the type stays consistent.'
+            yields = [self.local_defs[name] for name in names]
 
             # create YieldOp
             if len(yields) > 0:
                 self.builder.create_yield_op([y.handle for y in yields])
-            for_op_region = for_op.get_body(0).get_parent()
+            for_op_region = for_op_body.get_parent()
             assert for_op_region.size() == 1, "We use SCF, so the loop body should only have one block"
 
-            # update induction variable with actual value, and replace all uses
-            self.builder.set_insertion_point_to_start(for_op.get_body(0))
-            iv = for_op.get_induction_var()
-            if negative_step:
-                iv = self.builder.create_sub(ub, iv)
-                iv = self.builder.create_add(iv, lb)
-            self.lscope[node.target.id].handle.replace_all_uses_with(iv)
-            self.set_value(node.target.id, triton.language.core.tensor(iv, iv_type))
-
         # update lscope & local_defs (ForOp defines new values)
-        for i, name in enumerate(names):
-            self.set_value(name, triton.language.core.tensor(for_op.get_result(i), yields[i].type))
+        for name, result, y in zip(names, for_op.get_results(), yields):
+            self.set_value(name, triton.language.core.tensor(result, y.type))
 
         for stmt in node.orelse:
             assert False, "Don't know what to do with else after for"
@@ -817,13 +928,15 @@ class CodeGenerator(ast.NodeVisitor):
 
         kws = dict(self.visit(keyword) for keyword in node.keywords)
         args = [self.visit(arg) for arg in node.args]
-        if fn is triton.language.core.device_assert:   # TODO: this should not be so hardcoded
+        if fn is _device_assert:   # TODO: this should not be so hardcoded
             if not self.debug:
                 return
-        if isinstance(fn, triton.runtime.JITFunction):
-            from inspect import getcallargs
-            args = getcallargs(fn.fn, *args, **kws)
-            args = [args[name] for name in fn.arg_names]
+        if _is_jit_function(fn):
+            if kws or len(args) != len(fn.arg_names):
+                # keyword arguments and/or defaults to fill in
+                bound_args = _signature_of(fn.fn).bind(*args, **kws)
+                bound_args.apply_defaults()
+                args = [bound_args.arguments[name] for name in fn.arg_names]
             args = [arg if _is_triton_tensor(arg)
                     else triton.language.constexpr(arg) for arg in args]
             # generate function def
@@ -836,15 +949,15 @@ class CodeGenerator(ast.NodeVisitor):
             arg_types = [arg.type for arg in args if arg is not None]
             fn_name = mangle_fn(fn.__name__, arg_types, constants)
             # generate function def if necessary
-            if not self.module.has_function(fn_name):
+            # (`function_ret_types` is shared by all generators of the module and records
+            # every function generated so far, so the module only needs to be queried on a miss)
+            if fn_name not in self.function_ret_types and not self.module.has_function(fn_name):
                 prototype = triton.language.function_type([], arg_types)
                 gscope = sys.modules[fn.fn.__module__].__dict__
                 generator = CodeGenerator(self.builder.context, prototype, gscope, attributes, constants, module=self.module, function_name=fn_name, function_types=self.function_ret_types, debug=self.debug)
                 generator.visit(fn.parse())
-                callee_ret_type = generator.last_ret_type
-                self.function_ret_types[fn_name] = callee_ret_type
-            else:
-                callee_ret_type = self.function_ret_types[fn_name]
+                self.function_ret_types[fn_name] = generator.last_ret_type
+            callee_ret_type = self.function_ret_types[fn_name]
             symbol = self.module.get_function(fn_name)
             call_op = self.builder.call(symbol, arg_vals)
             if call_op.get_num_results() == 0 or callee_ret_type is None:
@@ -853,11 +966,9 @@ class CodeGenerator(ast.NodeVisitor):
                 return triton.language.tensor(call_op.get_result(0), callee_ret_type)
             else:
                 # should return a tuple of tl.tensor
-                results = []
-                for i in range(call_op.get_num_results()):
-                    results.append(triton.language.tensor(call_op.get_result(i), callee_ret_type[i]))
-                return tuple(results)
-        if (hasattr(fn, '__self__') and _is_triton_tensor(fn.__self__)) or impl.is_builtin(fn):
+                return tuple(triton.language.tensor(result, ty)
+                             for result, ty in zip(call_op.get_results(), callee_ret_type))
+        if (hasattr(fn, '__self__') and _is_triton_tensor(fn.__self__)) or _is_builtin(fn):
             return fn(*args, _builder=self.builder, **kws)
         if fn in self.builtin_namespace.values():
             args = map(_unwrap_if_constexpr, args)
@@ -871,11 +982,10 @@ class CodeGenerator(ast.NodeVisitor):
             raise UnsupportedLanguageConstruct(None, node, "chained boolean operators (A or B or C) are not supported; use parentheses to split the chain.")
         lhs = self.visit(node.values[0])
         rhs = self.visit(node.values[1])
-        method_name = self._method_name_for_bool_op.get(type(node.op))
+        method_name = _method_name_for_bool_op.get(type(node.op))
         if method_name is None:
             raise UnsupportedLanguageConstruct(None, node, "AST boolean operator '{}' is not (currently) implemented.".format(node.op.__name__))
         return self._apply_binary_method(method_name, lhs, rhs)
-    _method_name_for_bool_op: Dict[Type[ast.boolop], str] = {ast.And: 'logical_and', ast.Or: 'logical_or'}
 
     if sys.version_info < (3, 8):
         def visit_NameConstant(self, node):
@@ -919,17 +1029,15 @@ class CodeGenerator(ast.NodeVisitor):
     def visit(self, node):
         if node is not None:
             self.last_node = node
-        with warnings.catch_warnings():
-            # The ast library added visit_Constant and deprecated some other
-            # methods but we can't move to that without breaking Python 3.6 and 3.7.
-            warnings.simplefilter("ignore", DeprecationWarning)  # python 3.9
-            warnings.simplefilter("ignore", PendingDeprecationWarning)  # python 3.8
-            return super().visit(node)
+        visitor = self._visit_dispatch.get(type(node))
+        if visitor is None:
+            return self.generic_visit(node)
+        return visitor(self, node)
 
     def generic_visit(self, node):
         raise UnsupportedLanguageConstruct(None, node, "unsupported AST node type: {}".format(type(node).__name__))
 
-    # TODO: populate this here (rather than inside `_define_name_lookup`) once cyclic imports resolved
+    # TODO: populate this here (rather than inside `_define_builtins`) once cyclic imports resolved
     statically_implemented_functions: Dict[object, Callable[[ast.Call], Any]] = {}
 
     def execute_static_print(self, node: ast.Call) -> None:
@@ -960,6 +1068,9 @@ class CodeGenerator(ast.NodeVisitor):
         return None
 
 
+CodeGenerator._visit_dispatch = _build_visit_dispatch(CodeGenerator)
+
+
 class CompilationError(Exception):
     source_line_count_max_in_message = 12
 
@@ -1029,14 +1140,10 @@ class OutOfResources(Exception):
 def kernel_suffix(signature, specialization):
     # suffix format:
     # <argid><'c' if equal to 1><'d' if divisible by 16>
-    suffix = ''
-    for i, _ in enumerate(signature):
-        suffix += str(i)
-        if i in specialization.equal_to_1:
-            suffix += 'c'
-        if i in specialization.divisible_by_16:
-            suffix += 'd'
-    return suffix
+    equal_to_1 = specialization.equal_to_1
+    divisible_by_16 = specialization.divisible_by_16
+    return ''.join(f"{i}{'c' if i in equal_to_1 else ''}{'d' if i in divisible_by_16 else ''}"
+                   for i, _ in enumerate(signature))
 
 # ------------------------------------------------------------------------------
 # ------------------------------------------------------------------------------
@@ -1059,7 +1166,9 @@ def build_triton_ir(fn, signature, specialization, constants, debug=False):
     cst_key = lambda i: fn.arg_names.index(i) if isinstance(i, str) else i
     constants = {cst_key(key): value for key, value in constants.items()}
     # visit kernel AST
-    gscope = fn.__globals__.copy()
+    # the generator only reads from the global scope (callees already use their module's dict as is),
+    # so there is no need to copy it
+    gscope = fn.__globals__
     function_name = '_'.join([fn.__name__, kernel_suffix(signature.values(), specialization)])
     tys = list(signature.values())
     new_constants = {k: True if k in tys and tys[k] == "i1" else 1 for k in specialization.equal_to_1}
@@ -1187,6 +1296,10 @@ def ptx_to_cubin(ptx: str, compute_capability: int):
     return _triton.compile_ptx_to_cubin(ptx, ptxas, compute_capability)
 
 
+_ptx_kernel_name_re = re.compile(r'^[ \t]*// \.globl[ \t]+(\S+)', re.MULTILINE)
+_amdgcn_kernel_name_re = re.compile(r'^[ \t]*\.globl[ \t]+(\S+)', re.MULTILINE)
+
+
 def ptx_get_kernel_name(ptx: str) -> str:
     '''
     Get kernel name from PTX code.
@@ -1194,10 +1307,9 @@ def ptx_get_kernel_name(ptx: str) -> str:
     '''
     # There is a name mangling in PTX codegen, so the original kernel names in Triton IR are not available in PTX/cubin.
     assert ptx
-    for line in ptx.split('\n'):
-        line = line.strip()
-        if line.startswith('// .globl'):
-            return line.split()[-1]
+    match = _ptx_kernel_name_re.search(ptx)
+    if match is not None:
+        return match.group(1)
 
 
 def amdgcn_get_kernel_name(amdgcn: str) -> str:
@@ -1206,10 +1318,9 @@ def amdgcn_get_kernel_name(amdgcn: str) -> str:
     This Kernel name is required when launching the kernel.
     '''
     assert amdgcn
-    for line in amdgcn.split('\n'):
-        line = line.strip()
-        if line.startswith('.globl'):
-            return line.split()[-1].strip()
+    match = _amdgcn_kernel_name_re.search(amdgcn)
+    if match is not None:
+        return match.group(1)
 
 
 def llir_to_amdgcn_and_hsaco(mod: Any, gfx_arch: str, gfx_triple: str, gfx_features: str) -> Tuple[str, str]:
@@ -1239,6 +1350,12 @@ def ptx_get_version(cuda_version) -> int:
     raise RuntimeError("Triton only support CUDA 10.0 or higher")
 
 
+_ptxas_version_re = re.compile(r".*release (\d+\.\d+).*", flags=re.MULTILINE)
+
+
+# the ptxas lookup runs `ptxas --version` in a subprocess, do it once per process;
+# call `path_to_ptxas.cache_clear()` after changing TRITON_PTXAS_PATH
+@functools.lru_cache
 def path_to_ptxas():
     base_dir = os.path.dirname(__file__)
     paths = [
@@ -1250,7 +1367,7 @@ def path_to_ptxas():
         if os.path.exists(ptxas) and os.path.isfile(ptxas):
             result = subprocess.check_output([ptxas, "--version"], stderr=subprocess.STDOUT)
             if result is not None:
-                version = re.search(r".*release (\d+\.\d+).*", result.decode("utf-8"), flags=re.MULTILINE)
+                version = _ptxas_version_re.search(result.decode("utf-8"))
                 if version is not None:
                     return ptxas, version.group(1)
     raise RuntimeError("Cannot find ptxas")
@@ -1264,23 +1381,63 @@ instance_descriptor = namedtuple("instance_descriptor", ["divisible_by_16", "equ
 # ------------------------------------------------------------------------------
 
 
+_is_hip = torch.version.hip is not None
+
+# signature type string => C type of the kernel argument
+_ty_to_cpp = {
+    "i1": "int32_t",
+    "i8": "int8_t",
+    "i16": "int16_t",
+    "i32": "int32_t",
+    "i64": "int64_t",
+    "u32": "uint32_t",
+    "u64": "uint64_t",
+    "fp16": "float",
+    "bf16": "float",
+    "fp32": "float",
+    "f32": "float",
+    "fp64": "double",
+}
+
+# signature type string => C type the launcher parses the Python argument into
+_extracted_types = {
+    'i1': 'int32_t',
+    'i32': 'int32_t',
+    'i64': 'int64_t',
+    'u32': 'uint32_t',
+    'u64': 'uint64_t',
+    'fp16': 'float',
+    'bf16': 'float',
+    'fp32': 'float',
+    'f32': 'float',
+    'fp64': 'double',
+}
+
+# C type => CPython API function converting a Python object to it,
+# following the conversions `PyArg_ParseTuple` does for the matching format unit
+_conversion_of = {
+    "float": "PyFloat_AsDouble",
+    "double": "PyFloat_AsDouble",
+    "uint32_t": "PyLong_AsUnsignedLongMask",
+    "int32_t": "asInt",
+    "uint64_t": "PyLong_AsUnsignedLongLongMask",
+    "int64_t": "PyLong_AsLongLong",
+}
+
+# grid (3), num_warps, shared memory, stream, function, enter/exit hooks and the compiled kernel
+_num_launch_params = 10
+
+
 def ty_to_cpp(ty):
     if ty[0] == '*':
-        return "hipDeviceptr_t" if torch.version.hip is not None else "CUdeviceptr"
-    return {
-        "i1": "int32_t",
-        "i8": "int8_t",
-        "i16": "int16_t",
-        "i32": "int32_t",
-        "i64": "int64_t",
-        "u32": "uint32_t",
-        "u64": "uint64_t",
-        "fp16": "float",
-        "bf16": "float",
-        "fp32": "float",
-        "f32": "float",
-        "fp64": "double",
-    }[ty]
+        return "hipDeviceptr_t" if _is_hip else "CUdeviceptr"
+    return _ty_to_cpp[ty]
+
+
+def _extracted_type(ty):
+    if ty[0] == '*':
+        return "PyObject*"
+    return _extracted_types[ty]
 
 
 def generate_name_initializer(signature):
@@ -1293,296 +1450,236 @@ def generate_name_initializer(signature):
 def binary_name_to_header_name(name):
     if len(name) > 128:
         # avoid filename too long errors (filename limit is 255)
-        name = "kernel_" + hashlib.sha256(name.encode("utf-8")).hexdigest()
+        # only needs to be short and unique, not cryptographically strong
+        name = "kernel_" + hashlib.blake2b(name.encode("utf-8"), digest_size=16).hexdigest()
     return f"{name}.h"
 
 
-def generate_launcher(constants, signature):
-    arg_decls = ', '.join(f"{ty_to_cpp(ty)} arg{i}" for i, ty in signature.items())
-
-    def _extracted_type(ty):
-        if ty[0] == '*':
-            return "PyObject*"
-        return {
-            'i1': 'int32_t',
-            'i32': 'int32_t',
-            'i64': 'int64_t',
-            'u32': 'uint32_t',
-            'u64': 'uint64_t',
-            'fp16': 'float',
-            'bf16': 'float',
-            'fp32': 'float',
-            'f32': 'float',
-            'fp64': 'double',
-        }[ty]
-
-    def format_of(ty):
-        return {
-            "PyObject*": "O",
-            "float": "f",
-            "double": "d",
-            "long": "l",
-            "uint32_t": "I",
-            "int32_t": "i",
-            "uint64_t": "K",
-            "int64_t": "L",
-        }[ty]
-
-    format = "iiiiiKKOOO" + ''.join([format_of(_extracted_type(ty)) for ty in signature.values()])
-
-    # generate glue code
-    if torch.version.hip is not None:
-        src = f"""
-    #define __HIP_PLATFORM_AMD__
-    #include <hip/hip_runtime.h>
-    #include <Python.h>
-    #include <stdio.h>
-
-    static inline void gpuAssert(hipError_t code, const char *file, int line)
-    {{
-      if (code != HIP_SUCCESS)
-      {{
-         const char* prefix = "Triton Error [HIP]: ";
-         const char* str = hipGetErrorString(code);
-         char err[1024] = {{0}};
-         snprintf(err, 1024, "%s Code: %d, Messsage: %s", prefix, code, str );
-         PyErr_SetString(PyExc_RuntimeError, err);
-      }}
-    }}
-
-    #define HIP_CHECK(ans) {{ gpuAssert((ans), __FILE__, __LINE__); }}
-
-    static void _launch(int gridX, int gridY, int gridZ, int num_warps, int shared_memory, hipStream_t stream, hipFunction_t function, {arg_decls}) {{
-      void *params[] = {{ {', '.join(f"&arg{i}" for i in signature.keys() if i not in constants)} }};
-      if (gridX*gridY*gridZ > 0) {{
-          HIP_CHECK(hipModuleLaunchKernel(function, gridX, gridY, gridZ, 64*num_warps, 1, 1, shared_memory, stream, params, 0));
-      }}
-    }}
-
-    typedef struct _DevicePtrInfo {{
-      hipDeviceptr_t dev_ptr;
-      bool valid;
-    }} DevicePtrInfo;
-
-    static inline DevicePtrInfo getPointer(PyObject *obj, int idx) {{
-      DevicePtrInfo ptr_info;
-      ptr_info.dev_ptr = 0;
-      ptr_info.valid = true;
-
-      if (PyLong_Check(obj)) {{
-        ptr_info.dev_ptr = (hipDeviceptr_t)PyLong_AsUnsignedLongLong(obj);
-        return ptr_info;
-      }}
-
-      if (obj == Py_None) {{
-        // valid nullptr
-        return ptr_info;
-      }}
-
-      PyObject *ptr = PyObject_GetAttrString(obj, "data_ptr");
-
-      if (ptr) {{
-        PyObject *empty_tuple = PyTuple_New(0);
-        PyObject *ret = PyObject_Call(ptr, empty_tuple, NULL);
-        Py_DECREF(empty_tuple);
-        Py_DECREF(ptr);
-
-        if (!PyLong_Check(ret)) {{
-          PyErr_SetString(PyExc_TypeError, "data_ptr method of Pointer object must return 64-bit int");
-          ptr_info.valid = false;
-          return ptr_info;
-        }}
-
-        ptr_info.dev_ptr = (hipDeviceptr_t)PyLong_AsUnsignedLongLong(ret);
-
-        if (!ptr_info.dev_ptr)
-          return ptr_info;
+# launcher C sources: the backend header maps the few driver symbols the launcher uses to
+# `gpu*` names, the prelude doesn't depend on the kernel signature and is used as-is, and
+# the template is formatted by `generate_launcher` with the per-argument fragments
 
-        uint64_t dev_ptr;
-        hipError_t status = hipPointerGetAttribute(&dev_ptr, HIP_POINTER_ATTRIBUTE_DEVICE_POINTER, ptr_info.dev_ptr);
-        if (status == hipErrorInvalidValue) {{
-            PyErr_Format(PyExc_ValueError,
-                         "Pointer argument (at %d) cannot be accessed from Triton (cpu tensor?)", idx);
-            ptr_info.valid = false;
-        }}
+_hip_launcher_header = """#define __HIP_PLATFORM_AMD__
+#include <hip/hip_runtime.h>
+#include <stdbool.h>
+#include <Python.h>
+#include <stdio.h>
+
+static inline void gpuAssert(hipError_t code, const char *file, int line)
+{
+  if (code != HIP_SUCCESS)
+  {
+     const char* prefix = "Triton Error [HIP]: ";
+     const char* str = hipGetErrorString(code);
+     char err[1024] = {0};
+     snprintf(err, 1024, "%s Code: %d, Messsage: %s", prefix, code, str );
+     PyErr_SetString(PyExc_RuntimeError, err);
+  }
+}
 
-        ptr_info.dev_ptr = (hipDeviceptr_t)dev_ptr;
-        return ptr_info;
-      }}
+typedef hipError_t gpuError_t;
+typedef hipStream_t gpuStream_t;
+typedef hipFunction_t gpuFunction_t;
+typedef hipDeviceptr_t gpuDeviceptr_t;
+#define gpuLaunchKernel hipModuleLaunchKernel
+#define gpuPointerGetAttribute hipPointerGetAttribute
+#define GPU_POINTER_ATTRIBUTE_DEVICE_POINTER HIP_POINTER_ATTRIBUTE_DEVICE_POINTER
+#define GPU_ERROR_INVALID_VALUE hipErrorInvalidValue
+#define GPU_SUCCESS hipSuccess
+#define GPU_WARP_SIZE 64
+"""
 
-      PyErr_SetString(PyExc_TypeError, "Pointer argument must be either uint64 or have data_ptr method");
-      return ptr_info;
-    }}
-
-    static PyObject* launch(PyObject* self, PyObject* args) {{
-
-      int gridX, gridY, gridZ;
-      uint64_t _stream;
-      uint64_t _function;
-      int num_warps;
-      int shared_memory;
-      PyObject *launch_enter_hook = NULL;
-      PyObject *launch_exit_hook = NULL;
-      PyObject *compiled_kernel = NULL;
-
-      {' '.join([f"{_extracted_type(ty)} _arg{i}; " for i, ty in signature.items()])}
-      if (!PyArg_ParseTuple(args, \"{format}\", &gridX, &gridY, &gridZ, &num_warps, &shared_memory, &_stream, &_function, &launch_enter_hook, &launch_exit_hook, &compiled_kernel, {', '.join(f"&_arg{i}" for i, ty in signature.items())})) {{
-        return NULL;
-      }}
-
-      if (launch_enter_hook != Py_None) {{
-        PyObject_CallObject(launch_enter_hook, args);
-      }}
-
-      // raise exception asap
-      {"; ".join([f"DevicePtrInfo ptr_info{i} = getPointer(_arg{i}, {i}); if (!ptr_info{i}.valid) return NULL;" if ty[0] == "*" else "" for i, ty in signature.items()])};
-      _launch(gridX, gridY, gridZ, num_warps, shared_memory, (hipStream_t)_stream, (hipFunction_t)_function, {', '.join(f"ptr_info{i}.dev_ptr" if ty[0]=="*" else f"_arg{i}" for i, ty in signature.items())});
-      if (launch_exit_hook != Py_None) {{
-        PyObject_CallObject(launch_exit_hook, args);
-      }}
-      if (PyErr_Occurred()) {{
-        return NULL;
-      }}
-
-      // return None
-      Py_INCREF(Py_None);
-      return Py_None;
-    }}
-
-    static PyMethodDef ModuleMethods[] = {{
-      {{"launch", launch, METH_VARARGS, "Entry point for all kernels with this signature"}},
-      {{NULL, NULL, 0, NULL}} // sentinel
-    }};
-
-    static struct PyModuleDef ModuleDef = {{
-      PyModuleDef_HEAD_INIT,
-      \"__triton_launcher\",
-      NULL, //documentation
-      -1, //size
-      ModuleMethods
-    }};
-
-    PyMODINIT_FUNC PyInit___triton_launcher(void) {{
-      PyObject *m = PyModule_Create(&ModuleDef);
-      if(m == NULL) {{
-        return NULL;
-      }}
-      PyModule_AddFunctions(m, ModuleMethods);
-      return m;
-    }}
-    """
-    else:
-        src = f"""
-#include \"cuda.h\"
+_cuda_launcher_header = """#include \"cuda.h\"
 #include <stdbool.h>
 #include <Python.h>
 
 static inline void gpuAssert(CUresult code, const char *file, int line)
-{{
+{
    if (code != CUDA_SUCCESS)
-   {{
+   {
       const char* prefix = "Triton Error [CUDA]: ";
       const char* str;
       cuGetErrorString(code, &str);
-      char err[1024] = {{0}};
+      char err[1024] = {0};
       strcat(err, prefix);
       strcat(err, str);
       PyErr_SetString(PyExc_RuntimeError, err);
-   }}
-}}
+   }
+}
 
-#define CUDA_CHECK(ans) {{ gpuAssert((ans), __FILE__, __LINE__); }}
+typedef CUresult gpuError_t;
+typedef CUstream gpuStream_t;
+typedef CUfunction gpuFunction_t;
+typedef CUdeviceptr gpuDeviceptr_t;
+#define gpuLaunchKernel cuLaunchKernel
+#define gpuPointerGetAttribute cuPointerGetAttribute
+#define GPU_POINTER_ATTRIBUTE_DEVICE_POINTER CU_POINTER_ATTRIBUTE_DEVICE_POINTER
+#define GPU_ERROR_INVALID_VALUE CUDA_ERROR_INVALID_VALUE
+#define GPU_SUCCESS CUDA_SUCCESS
+#define GPU_WARP_SIZE 32
+"""
 
-static void _launch(int gridX, int gridY, int gridZ, int num_warps, int shared_memory, CUstream stream, CUfunction function, {arg_decls}) {{
-  void *params[] = {{ {', '.join(f"&arg{i}" for i in signature.keys() if i not in constants)} }};
-  if(gridX*gridY*gridZ > 0){{
-    CUDA_CHECK(cuLaunchKernel(function, gridX, gridY, gridZ, 32*num_warps, 1, 1, shared_memory, stream, params, 0));
-  }}
-}}
+_launcher_prelude = (_hip_launcher_header if _is_hip else _cuda_launcher_header) + """
+#define GPU_CHECK(ans) { gpuAssert((ans), __FILE__, __LINE__); }
+
+// converts to int like the "i" format of PyArg_ParseTuple: values out of range raise OverflowError
+static inline int asInt(PyObject *obj) {
+  long value = PyLong_AsLong(obj);
+  if (value == -1 && PyErr_Occurred())
+    return -1;
+  if (value > INT_MAX) {
+    PyErr_SetString(PyExc_OverflowError, "signed integer is greater than maximum");
+    return -1;
+  }
+  if (value < INT_MIN) {
+    PyErr_SetString(PyExc_OverflowError, "signed integer is less than minimum");
+    return -1;
+  }
+  return (int)value;
+}
 
-typedef struct _DevicePtrInfo {{
-    CUdeviceptr dev_ptr;
-    bool valid;
-}} DevicePtrInfo;
+// launch hooks are normally unset, keep their handling off the fall-through path
+#define UNLIKELY(x) __builtin_expect(!!(x), 0)
+
+// hooks are called with the launch arguments as a tuple, which is only built when a hook is set
+static void callHook(PyObject *hook, PyObject *const *args, Py_ssize_t nargs) {
+  PyObject *hook_args = PyTuple_New(nargs);
+  if (hook_args == NULL)
+    return;
+  for (Py_ssize_t i = 0; i < nargs; i++) {
+    Py_INCREF(args[i]);
+    PyTuple_SET_ITEM(hook_args, i, args[i]);
+  }
+  PyObject *ret = PyObject_CallObject(hook, hook_args);
+  Py_XDECREF(ret);
+  Py_DECREF(hook_args);
+}
 
-static inline DevicePtrInfo getPointer(PyObject *obj, int idx) {{
+// interned name of the method returning the address of a tensor
+static PyObject *data_ptr_name = NULL;
+
+// device pointers that passed the accessibility check, as (pointer, device pointer), per argument position;
+// tensors are usually passed again at the same position, so the driver is only queried for new pointers
+#define MAX_VALIDATED_PTRS 64
+static uint64_t validated_ptrs[MAX_VALIDATED_PTRS][2];
+
+typedef struct _DevicePtrInfo {
+  gpuDeviceptr_t dev_ptr;
+  bool valid;
+} DevicePtrInfo;
+
+static inline DevicePtrInfo getPointer(PyObject *obj, int idx) {
   DevicePtrInfo ptr_info;
   ptr_info.dev_ptr = 0;
   ptr_info.valid = true;
-  if (PyLong_Check(obj)) {{
-    ptr_info.dev_ptr = PyLong_AsUnsignedLongLong(obj);
+
+  if (PyLong_Check(obj)) {
+    ptr_info.dev_ptr = (gpuDeviceptr_t)PyLong_AsUnsignedLongLong(obj);
     return ptr_info;
-  }}
-  if (obj == Py_None) {{
+  }
+
+  if (obj == Py_None) {
     // valid nullptr
     return ptr_info;
-  }}
-  PyObject *ptr = PyObject_GetAttrString(obj, "data_ptr");
-  if(ptr){{
-    PyObject *empty_tuple = PyTuple_New(0);
-    PyObject *ret = PyObject_Call(ptr, empty_tuple, NULL);
-    Py_DECREF(empty_tuple);
-    Py_DECREF(ptr);
-    if (!PyLong_Check(ret)) {{
+  }
+
+  PyObject *ret = PyObject_CallMethodObjArgs(obj, data_ptr_name, NULL);
+
+  if (ret) {
+    if (!PyLong_Check(ret)) {
       PyErr_SetString(PyExc_TypeError, "data_ptr method of Pointer object must return 64-bit int");
+      Py_DECREF(ret);
       ptr_info.valid = false;
       return ptr_info;
-    }}
-    ptr_info.dev_ptr = PyLong_AsUnsignedLongLong(ret);
-    if(!ptr_info.dev_ptr)
+    }
+
+    uint64_t ptr = PyLong_AsUnsignedLongLong(ret);
+    Py_DECREF(ret);
+    ptr_info.dev_ptr = (gpuDeviceptr_t)ptr;
+
+    if (!ptr_info.dev_ptr)
+      return ptr_info;
+
+    // the pointer passed at this position last time was already checked
+    uint64_t *validated = validated_ptrs[idx % MAX_VALIDATED_PTRS];
+    if (validated[0] == ptr) {
+      ptr_info.dev_ptr = (gpuDeviceptr_t)validated[1];
       return ptr_info;
+    }
+
     uint64_t dev_ptr;
-    int status = cuPointerGetAttribute(&dev_ptr, CU_POINTER_ATTRIBUTE_DEVICE_POINTER, ptr_info.dev_ptr);
-    if (status == CUDA_ERROR_INVALID_VALUE) {{
+    gpuError_t status = gpuPointerGetAttribute(&dev_ptr, GPU_POINTER_ATTRIBUTE_DEVICE_POINTER, ptr_info.dev_ptr);
+    if (status == GPU_ERROR_INVALID_VALUE) {
         PyErr_Format(PyExc_ValueError,
                      "Pointer argument (at %d) cannot be accessed from Triton (cpu tensor?)", idx);
         ptr_info.valid = false;
-    }}
-    ptr_info.dev_ptr = dev_ptr;
-    Py_DECREF(ret);  // Thanks ChatGPT!
+    } else if (status == GPU_SUCCESS) {
+      validated[0] = ptr;
+      validated[1] = dev_ptr;
+    }
+
+    ptr_info.dev_ptr = (gpuDeviceptr_t)dev_ptr;
     return ptr_info;
-  }}
-  PyErr_SetString(PyExc_TypeError, "Pointer argument must be either uint64 or have data_ptr method");
+  }
+
+  // only report a missing data_ptr method, an exception raised by data_ptr itself is kept as-is
+  if (PyErr_ExceptionMatches(PyExc_AttributeError)) {
+    PyErr_Clear();
+    PyErr_SetString(PyExc_TypeError, "Pointer argument must be either uint64 or have data_ptr method");
+  }
+  ptr_info.valid = false;
   return ptr_info;
+}
+
+"""
+
+_launcher_template = """static void _launch(int gridX, int gridY, int gridZ, int num_warps, int shared_memory, gpuStream_t stream, gpuFunction_t function, {arg_decls}) {{
+  void *params[] = {{ {params} }};
+  if (gridX*gridY*gridZ > 0) {{
+    GPU_CHECK(gpuLaunchKernel(function, gridX, gridY, gridZ, GPU_WARP_SIZE*num_warps, 1, 1, shared_memory, stream, params, 0));
+  }}
 }}
 
-static PyObject* launch(PyObject* self, PyObject* args) {{
-  int gridX, gridY, gridZ;
-  uint64_t _stream;
-  uint64_t _function;
-  int num_warps;
-  int shared_memory;
-  PyObject *launch_enter_hook = NULL;
-  PyObject *launch_exit_hook = NULL;
-  PyObject *compiled_kernel = NULL;
-  {' '.join([f"{_extracted_type(ty)} _arg{i}; " for i, ty in signature.items()])}
-  if(!PyArg_ParseTuple(args, \"{format}\", &gridX, &gridY, &gridZ, &num_warps, &shared_memory, &_stream, &_function, &launch_enter_hook, &launch_exit_hook, &compiled_kernel, {', '.join(f"&_arg{i}" for i, ty in signature.items())})) {{
+static PyObject* launch(PyObject* self, PyObject *const *args, Py_ssize_t nargs) {{
+  if (nargs != {nargs}) {{
+    PyErr_Format(PyExc_TypeError, "launch() takes exactly {nargs} arguments (%zd given)", nargs);
     return NULL;
   }}
-
-  if (launch_enter_hook != Py_None) {{
-    PyObject_CallObject(launch_enter_hook, args);
+  int gridX = asInt(args[0]);
+  int gridY = asInt(args[1]);
+  int gridZ = asInt(args[2]);
+  int num_warps = asInt(args[3]);
+  int shared_memory = asInt(args[4]);
+  uint64_t _stream = PyLong_AsUnsignedLongLongMask(args[5]);
+  uint64_t _function = PyLong_AsUnsignedLongLongMask(args[6]);
+  PyObject *launch_enter_hook = args[7];
+  PyObject *launch_exit_hook = args[8];
+  {arg_vars}
+  if (PyErr_Occurred()) {{
+    return NULL;
   }}
 
+  if (UNLIKELY(launch_enter_hook != Py_None)) {{
+    callHook(launch_enter_hook, args, nargs);
+  }}
 
   // raise exception asap
-  {"; ".join([f"DevicePtrInfo ptr_info{i} = getPointer(_arg{i}, {i}); if (!ptr_info{i}.valid) return NULL;" if ty[0] == "*" else "" for i, ty in signature.items()])};
-  _launch(gridX, gridY, gridZ, num_warps, shared_memory, (CUstream)_stream, (CUfunction)_function, {', '.join(f"ptr_info{i}.dev_ptr" if ty[0]=="*" else f"_arg{i}"for i, ty in signature.items())});
-
-  if (launch_exit_hook != Py_None) {{
-    PyObject_CallObject(launch_exit_hook, args);
+  {ptr_infos}
+  _launch(gridX, gridY, gridZ, num_warps, shared_memory, (gpuStream_t)_stream, (gpuFunction_t)_function, {launch_args});
+  if (UNLIKELY(launch_exit_hook != Py_None)) {{
+    callHook(launch_exit_hook, args, nargs);
   }}
-
-  if(PyErr_Occurred()) {{
+  if (PyErr_Occurred()) {{
     return NULL;
   }}
+
   // return None
   Py_INCREF(Py_None);
   return Py_None;
 }}
 
 static PyMethodDef ModuleMethods[] = {{
-  {{"launch", launch, METH_VARARGS, "Entry point for all kernels with this signature"}},
+  {{"launch", (PyCFunction)(void(*)(void))launch, METH_FASTCALL, "Entry point for all kernels with this signature"}},
   {{NULL, NULL, 0, NULL}} // sentinel
 }};
 
@@ -1595,6 +1692,10 @@ static struct PyModuleDef ModuleDef = {{
 }};
 
 PyMODINIT_FUNC PyInit___triton_launcher(void) {{
+  data_ptr_name = PyUnicode_InternFromString("data_ptr");
+  if(data_ptr_name == NULL) {{
+    return NULL;
+  }}
   PyObject *m = PyModule_Create(&ModuleDef);
   if(m == NULL) {{
     return NULL;
@@ -1603,7 +1704,37 @@ PyMODINIT_FUNC PyInit___triton_launcher(void) {{
   return m;
 }}
 """
-    return src
+
+
+def generate_launcher(constants, signature):
+    # assemble all per-argument fragments of the launcher in a single pass over the signature
+    arg_decls = []      # parameters of `_launch`
+    params = []         # kernel parameters, i.e. non-constexpr arguments
+    arg_vars = []       # conversions of the Python arguments
+    ptr_infos = []      # device pointer extraction
+    launch_args = []    # arguments forwarded to `_launch`
+    # kernel arguments follow the 9 launch parameters and the compiled kernel
+    for arg_idx, (i, ty) in enumerate(signature.items(), _num_launch_params):
+        arg_decls.append(f"{ty_to_cpp(ty)} arg{i}")
+        if i not in constants:
+            params.append(f"&arg{i}")
+        if ty[0] == '*':
+            arg_vars.append(f"PyObject *_arg{i} = args[{arg_idx}];")
+            ptr_infos.append(f"DevicePtrInfo ptr_info{i} = getPointer(_arg{i}, {i}); if (!ptr_info{i}.valid) return NULL;")
+            launch_args.append(f"ptr_info{i}.dev_ptr")
+        else:
+            c_ty = _extracted_types[ty]
+            arg_vars.append(f"{c_ty} _arg{i} = ({c_ty}){_conversion_of[c_ty]}(args[{arg_idx}]);")
+            launch_args.append(f"_arg{i}")
+    arg_decls = ', '.join(arg_decls)
+    params = ', '.join(params)
+    arg_vars = ' '.join(arg_vars)
+    ptr_infos = ' '.join(ptr_infos)
+    launch_args = ', '.join(launch_args)
+
+    return _launcher_prelude + _launcher_template.format(
+        nargs=_num_launch_params + len(signature), arg_decls=arg_decls, params=params,
+        arg_vars=arg_vars, ptr_infos=ptr_infos, launch_args=launch_args)
 
 
 def default_cache_dir():
@@ -1611,15 +1742,14 @@ def default_cache_dir():
 
 
 class CacheManager:
+    __slots__ = ("key", "cache_dir")
 
     def __init__(self, key):
         self.key = key
-        self.lock_path = None
         # create cache directory if it doesn't exist
         self.cache_dir = os.environ.get('TRITON_CACHE_DIR', default_cache_dir())
         if self.cache_dir:
             self.cache_dir = os.path.join(self.cache_dir, self.key)
-            self.lock_path = os.path.join(self.cache_dir, "lock")
             os.makedirs(self.cache_dir, exist_ok=True)
 
     def _make_path(self, filename):
@@ -1636,42 +1766,76 @@ class CacheManager:
         binary = isinstance(data, bytes)
         if not binary:
             data = str(data)
-        assert self.lock_path is not None
         filepath = self._make_path(filename)
-        with FileLock(self.lock_path):
-            # use tempfile to be robust against program interruptions
-            mode = "wb" if binary else "w"
-            with open(filepath + ".tmp", mode) as f:
-                f.write(data)
-            os.rename(filepath + ".tmp", filepath)
+        # use tempfile to be robust against program interruptions; the temporary file is
+        # private to this writer and the rename is atomic, so concurrent writers need no lock
+        mode = "wb" if binary else "w"
+        temp_path = f"{filepath}.tmp.pid_{os.getpid()}_{uuid.uuid4().hex}"
+        with open(temp_path, mode) as f:
+            f.write(data)
+        os.replace(temp_path, filepath)
+
+    def put_file(self, src_path, filename):
+        # same as `put`, for data that is already in a file: copied without reading it into memory
+        if not self.cache_dir:
+            return
+        filepath = self._make_path(filename)
+        temp_path = f"{filepath}.tmp.pid_{os.getpid()}_{uuid.uuid4().hex}"
+        shutil.copyfile(src_path, temp_path)
+        os.replace(temp_path, filepath)
 
 
 # Utilities for generating and compiling C wrappers
 
 
-@functools.lru_cache()
+def _disk_cached_env(name, is_valid):
+    # persist the result of a slow environment probe (e.g., a subprocess) across
+    # processes; `is_valid(*args, value)` is checked on every load so that stale
+    # entries are recomputed instead of trusted
+    def decorator(probe):
+        @functools.lru_cache()
+        def wrapper(*args):
+            key = [sys.platform, *args]
+            cache_manager = CacheManager("env")
+            file_name = f"{name}.json"
+            if cache_manager.has_file(file_name):
+                try:
+                    with open(cache_manager._make_path(file_name)) as f:
+                        entry = json.load(f)
+                    if entry["key"] == key and is_valid(*args, entry["value"]):
+                        return entry["value"]
+                except (OSError, ValueError, KeyError, TypeError):
+                    pass
+            value = probe(*args)
+            if is_valid(*args, value):
+                cache_manager.put(json.dumps({"key": key, "value": value}), file_name, binary=False)
+            return value
+        return wrapper
+    return decorator
+
+
+def _has_libcuda(dirs):
+    return bool(dirs) and all(os.path.exists(os.path.join(d, "libcuda.so")) for d in dirs)
+
+
+@_disk_cached_env("libcuda_dirs", _has_libcuda)
 def libcuda_dirs():
     locs = subprocess.check_output(["whereis", "libcuda.so"]).decode().strip().split()[1:]
     return [os.path.dirname(loc) for loc in locs]
 
 
-@contextlib.contextmanager
-def quiet():
-    old_stdout, old_stderr = sys.stdout, sys.stderr
-    sys.stdout, sys.stderr = io.StringIO(), io.StringIO()
-    try:
-        yield
-    finally:
-        sys.stdout, sys.stderr = old_stdout, old_stderr
-
-
 @functools.lru_cache()
 def rocm_path_dir():
     return os.getenv("ROCM_PATH", default="/opt/rocm")
 
 
+# extension modules can only be imported by the interpreter (version, ABI, platform) they
+# were built for, which the suffix identifies, so it is part of the keys of cached modules
+_ext_suffix = sysconfig.get_config_var('EXT_SUFFIX')
+
+
 def _build(name, src, srcdir):
-    if torch.version.hip is not None:
+    if _is_hip:
         hip_lib_dir = os.path.join(rocm_path_dir(), "lib")
         hip_include_dir = os.path.join(rocm_path_dir(), "include")
     else:
@@ -1685,9 +1849,7 @@ def _build(name, src, srcdir):
         triton_cuda_header = os.path.join(triton_include_dir, "cuda.h")
         if not os.path.exists(cuda_header) and os.path.exists(triton_cuda_header):
             cu_include_dir = triton_include_dir
-    suffix = sysconfig.get_config_var('EXT_SUFFIX')
-    so = os.path.join(srcdir, '{name}{suffix}'.format(name=name, suffix=suffix))
-    # try to avoid setuptools if possible
+    so = os.path.join(srcdir, '{name}{suffix}'.format(name=name, suffix=_ext_suffix))
     cc = os.environ.get("CC")
     if cc is None:
         # TODO: support more things here.
@@ -1707,61 +1869,33 @@ def _build(name, src, srcdir):
         scheme = 'posix_prefix'
     py_include_dir = sysconfig.get_paths(scheme=scheme)["include"]
 
-    if torch.version.hip is not None:
-        ret = subprocess.check_call([cc, src, f"-I{hip_include_dir}", f"-I{py_include_dir}", f"-I{srcdir}", "-shared", "-fPIC", f"-L{hip_lib_dir}", "-lamdhip64", "-o", so])
+    # these modules are thin glue around driver calls, so optimizing them
+    # harder only makes the first launch slower; -O1 rather than -O0 as the
+    # launcher's argument conversion still runs on every launch
+    if _is_hip:
+        cc_cmd = [cc, src, "-O1", "-pipe", f"-I{hip_include_dir}", f"-I{py_include_dir}", f"-I{srcdir}", "-shared", "-fPIC", f"-L{hip_lib_dir}", "-lamdhip64", "-o", so]
     else:
-        cc_cmd = [cc, src, "-O3", f"-I{cu_include_dir}", f"-I{py_include_dir}", f"-I{srcdir}", "-shared", "-fPIC", "-lcuda", "-o", so]
+        cc_cmd = [cc, src, "-O1", "-pipe", f"-I{cu_include_dir}", f"-I{py_include_dir}", f"-I{srcdir}", "-shared", "-fPIC", "-lcuda", "-o", so]
         cc_cmd += [f"-L{dir}" for dir in cuda_lib_dirs]
-        ret = subprocess.check_call(cc_cmd)
-
-    if ret == 0:
-        return so
-    # fallback on setuptools
-    extra_compile_args = []
-    library_dirs = cuda_lib_dirs
-    include_dirs = [srcdir, cu_include_dir]
-    libraries = ['cuda']
-    # extra arguments
-    extra_link_args = []
-    # create extension module
-    ext = setuptools.Extension(
-        name=name,
-        language='c',
-        sources=[src],
-        include_dirs=include_dirs,
-        extra_compile_args=extra_compile_args + ['-O3'],
-        extra_link_args=extra_link_args,
-        library_dirs=library_dirs,
-        libraries=libraries,
-    )
-    # build extension module
-    args = ['build_ext']
-    args.append('--build-temp=' + srcdir)
-    args.append('--build-lib=' + srcdir)
-    args.append('-q')
-    args = dict(
-        name=name,
-        ext_modules=[ext],
-        script_args=args,
-    )
-    with quiet():
-        setuptools.setup(**args)
+    ret = subprocess.run(cc_cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    if ret.returncode != 0:
+        raise RuntimeError(f"Failed to compile {name} with {cc}:\n{ret.stdout.decode(errors='replace')}")
     return so
 
 
 def make_so_cache_key(version_hash, signature, constants):
     # Get unique key for the compiled code
     signature = {k: 'ptr' if v[0] == '*' else v for k, v in signature.items()}
-    key = f"{version_hash}-{''.join(signature.values())}{constants}"
+    key = f"{version_hash}-{_ext_suffix}-{''.join(signature.values())}{constants}"
     key = hashlib.md5(key.encode("utf-8")).hexdigest()
     return key
 
 
-def make_fn_cache_key(fn_hash, signature, configs, constants, num_warps, num_stages):
+def make_fn_cache_key(fn_hash, signature, configs, constants, num_warps, num_stages, capability):
     # Get unique key for the compiled code
     get_conf_key = lambda conf: (sorted(conf.divisible_by_16), sorted(conf.equal_to_1))
     configs_key = [get_conf_key(conf) for conf in configs]
-    key = f"{fn_hash}-{''.join(signature.values())}-{configs_key}-{constants}-{num_warps}-{num_stages}"
+    key = f"{fn_hash}-{''.join(signature.values())}-{configs_key}-{constants}-{num_warps}-{num_stages}-{capability}"
     key = hashlib.md5(key.encode("utf-8")).hexdigest()
     return key
 
@@ -1788,8 +1922,15 @@ def get_amdgpu_arch_fulldetails():
     get the amdgpu fulll ISA details for compiling:
     i.e., arch_triple: amdgcn-amd-amdhsa; arch_name: gfx906; arch_features: sramecc+:xnack-
     """
+    return _probe_amdgpu_arch_fulldetails(rocm_path_dir())
+
+
+# the arch depends on the GPUs of the host, which nothing cheap can revalidate, so it
+# is only memoized in-process
+@functools.lru_cache()
+def _probe_amdgpu_arch_fulldetails(rocm_path):
     try:
-        rocminfo = subprocess.check_output(rocm_path_dir() + '/bin/rocminfo').decode()
+        rocminfo = subprocess.check_output(rocm_path + '/bin/rocminfo').decode()
         gfx_arch_details = re.search('amd.*', rocminfo).group(0).strip().split('--')
         arch_triple = gfx_arch_details[0]
         arch_name_features = gfx_arch_details[1].split(':')
@@ -1811,38 +1952,55 @@ def make_stub(name, signature, constants):
     so_name = f"{name}.so"
     # retrieve stub from cache if it exists
     if not so_cache_manager.has_file(so_name):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            src = generate_launcher(constants, signature)
-            src_path = os.path.join(tmpdir, "main.c")
-            with open(src_path, "w") as f:
-                f.write(src)
-            so = _build(name, src_path, tmpdir)
-            with open(so, "rb") as f:
-                so_cache_manager.put(f.read(), so_name, binary=True)
+        # concurrent processes would all build the stub: one builds it, the others wait for it
+        with FileLock(so_cache_manager._make_path(f"{so_name}.lock")):
+            if not so_cache_manager.has_file(so_name):
+                src = generate_launcher(constants, signature)
+                so_cache_manager.put(_build_launcher(src, os.environ.get("CC")), so_name, binary=True)
     return so_cache_manager._make_path(so_name)
 
 
-def convert_type_repr(x):
-    match = re.search(r'!tt\.ptr<(.*)>', x)
-    if match is not None:
-        return '*' + convert_type_repr(match.group(1))
-    return x
+# the launcher source does not depend on the values of constexprs nor on the
+# kernel name, so many stub cache keys share the same build
+@functools.lru_cache(maxsize=64)
+def _build_launcher(src, cc):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        src_path = os.path.join(tmpdir, "main.c")
+        with open(src_path, "w") as f:
+            f.write(src)
+        so = _build("__triton_launcher", src_path, tmpdir)
+        with open(so, "rb") as f:
+            return f.read()
+
 
+_tt_ptr_re = re.compile(r'!tt\.ptr<(.*)>')
 
-def make_hash(fn, **kwargs):
+
+def convert_type_repr(x):
+    prefix = ''
+    match = _tt_ptr_re.search(x)
+    while match is not None:
+        prefix += '*'
+        x = match.group(1)
+        match = _tt_ptr_re.search(x)
+    return prefix + x
+
+
+# the binaries are only valid for the architecture they were compiled for, so `capability`
+# is part of the key: a cache directory may be shared by devices of different architectures
+def make_hash(fn, capability, **kwargs):
     if isinstance(fn, triton.runtime.JITFunction):
-        configs = kwargs["configs"]
-        signature = kwargs["signature"]
-        constants = kwargs.get("constants", dict())
-        num_warps = kwargs.get("num_warps", 4)
-        num_stages = kwargs.get("num_stages", 3)
-        # Get unique key for the compiled code
-        get_conf_key = lambda conf: (sorted(conf.divisible_by_16), sorted(conf.equal_to_1))
-        configs_key = [get_conf_key(conf) for conf in configs]
-        key = f"{fn.cache_key}-{''.join(signature.values())}-{configs_key}-{constants}-{num_warps}-{num_stages}"
-        return hashlib.md5(key.encode("utf-8")).hexdigest()
+        return make_fn_cache_key(fn.cache_key, kwargs["signature"], kwargs["configs"], kwargs.get("constants", dict()),
+                                 kwargs.get("num_warps", 4), kwargs.get("num_stages", 3), capability)
     assert isinstance(fn, str)
-    return hashlib.md5((Path(fn).read_text() + triton.runtime.jit.version_key()).encode("utf-8")).hexdigest()
+    # stream the file instead of materializing it as a str
+    md5 = hashlib.md5()
+    with open(fn, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            md5.update(chunk)
+    md5.update(triton.runtime.jit.version_key().encode("utf-8"))
+    md5.update(f"-{capability}".encode("utf-8"))
+    return md5.hexdigest()
 
 
 # - ^\s*func\.func\s+ : match the start of the string, any leading whitespace, the keyword func,
@@ -1867,25 +2025,52 @@ arg_type_pattern = {
     "ttgir": mlir_arg_type_pattern,
     "ptx": ptx_arg_type_pattern,
 }
+_prototype_re = {ir: re.compile(pattern, re.MULTILINE) for ir, pattern in prototype_pattern.items()}
+_arg_type_re = {ir: re.compile(pattern) for ir, pattern in arg_type_pattern.items()}
+
+
+_jsonable_scalar_types = (int, float, str, type(None))
 
 
 def _get_jsonable_constants(constants):
     def _is_jsonable(x):
+        if isinstance(x, _jsonable_scalar_types):
+            return True
+        if not isinstance(x, (list, tuple, dict)):
+            return False
         try:
             json.dumps(x)
             return True
-        except (TypeError, OverflowError):
+        except (TypeError, OverflowError, ValueError):
             return False
     serialized_constants = {}
-    for constant in constants:
-        if _is_jsonable(constants[constant]):
-            serialized_constants[constant] = constants[constant]
+    for constant, value in constants.items():
+        if _is_jsonable(value):
+            serialized_constants[constant] = value
     return serialized_constants
 
 # def compile(fn, signature: str, device: int = -1, constants=dict(), num_warps: int = 4, num_stages: int = 3, extern_libs=None, configs=None):
 
 
-@static_vars(discovered_gfx_arch_fulldetails=get_amdgpu_arch_fulldetails())
+def _stat_signature(path):
+    # identifies the version of a cached stage file with a single stat; a list, to
+    # compare equal to what json gives back
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+# compilation stages, in pipeline order
+if _is_hip:
+    _stage_names = ("ast", "ttir", "ttgir", "llir", "amdgcn")
+else:
+    _stage_names = ("ast", "ttir", "ttgir", "llir", "ptx", "cubin")
+_stage_index = {ir: i for i, ir in enumerate(_stage_names)}
+
+
+@static_vars(discovered_gfx_arch_fulldetails=get_amdgpu_arch_fulldetails() if _is_hip else None)
 def compile(fn, **kwargs):
     capability = kwargs.get("cc", None)
     if capability is None:
@@ -1903,7 +2088,7 @@ def compile(fn, **kwargs):
     extern_libs = kwargs.get("extern_libs", dict())
     debug = kwargs.get("debug", False)
     # build compilation stages
-    if torch.version.hip is not None:
+    if _is_hip:
         _triton.set_rocm()
         if extern_libs is None:
             extern_libs = get_amdgcn_bitcode_paths()
@@ -1954,7 +2139,6 @@ def compile(fn, **kwargs):
         assert len(configs) == 1
         kwargs["configs"] = configs
         name = fn.__name__
-        first_stage = 0
         if isinstance(signature, str):
             signature = {k: v.strip() for k, v in enumerate(signature.split(","))}
         kwargs["signature"] = signature
@@ -1962,20 +2146,18 @@ def compile(fn, **kwargs):
         assert isinstance(fn, str)
         _, ir = os.path.basename(fn).split(".")
         src = Path(fn).read_text()
-        import re
-        match = re.search(prototype_pattern[ir], src, re.MULTILINE)
+        match = _prototype_re[ir].search(src)
         name, signature = match.group(1), match.group(2)
         # print(name, signature)
-        types = re.findall(arg_type_pattern[ir], signature)
+        types = _arg_type_re[ir].findall(signature)
         # print(types)
         param_tys = [convert_type_repr(ty) for ty in types]
         signature = {k: v for k, v in enumerate(param_tys)}
-        first_stage = list(stages.keys()).index(ir)
 
     # cache manager
     so_path = make_stub(name, signature, constants)
     # create cache manager
-    fn_cache_manager = CacheManager(make_hash(fn, **kwargs))
+    fn_cache_manager = CacheManager(make_hash(fn, capability, **kwargs))
     # determine name and extension type of provided function
     if isinstance(fn, triton.runtime.JITFunction):
         name, ext = fn.__name__, "ast"
@@ -1989,22 +2171,22 @@ def compile(fn, **kwargs):
             metadata = json.load(f)
     else:
         metadata = {"num_warps": num_warps, "num_stages": num_stages,
-                    "constants": _get_jsonable_constants(constants), "ctime": dict(), "debug": debug}
+                    "constants": _get_jsonable_constants(constants), "stat": dict(), "debug": debug}
         if ext == "ptx":
             assert "shared" in kwargs, "ptx compilation must provide shared memory size"
             metadata["shared"] = kwargs["shared"]
 
-    first_stage = list(stages.keys()).index(ext)
     asm = dict()
     module = fn
+    # metadata written before stages were tracked by their stat signature has none
+    stats = metadata.setdefault("stat", dict())
     # run compilation pipeline  and populate metadata
-    for ir, (parse, compile_kernel) in list(stages.items())[first_stage:]:
+    for ir in _stage_names[_stage_index[ext]:]:
+        parse, compile_kernel = stages[ir]
         path = fn_cache_manager._make_path(f"{name}.{ir}")
         if ir == ext:
             next_module = parse(fn)
-        elif os.path.exists(path) and\
-                ir in metadata["ctime"] and\
-                os.path.getctime(path) == metadata["ctime"][ir]:
+        elif ir in stats and _stat_signature(path) == stats[ir]:
             if ir == "amdgcn":
                 next_module = (parse(path), parse(fn_cache_manager._make_path(f"{name}.hsaco_path")))
             else:
@@ -2015,15 +2197,16 @@ def compile(fn, **kwargs):
                 fn_cache_manager.put(next_module[0], f"{name}.{ir}")
                 fn_cache_manager.put(next_module[1], f"{name}.hsaco_path")
             else:
-                fn_cache_manager.put(next_module, f"{name}.{ir}")
-        if os.path.exists(path):
-            metadata["ctime"][ir] = os.path.getctime(path)
-        if ir == "cubin":
-            asm[ir] = next_module
-        elif ir == "amdgcn":
+                # print the module only once: the same text is cached and kept in `asm`
+                asm[ir] = next_module if ir == "cubin" else str(next_module)
+                fn_cache_manager.put(asm[ir], f"{name}.{ir}")
+        stat = _stat_signature(path)
+        if stat is not None:
+            stats[ir] = stat
+        if ir == "amdgcn":
             asm[ir] = str(next_module[0])
-        else:
-            asm[ir] = str(next_module)
+        elif ir not in asm:
+            asm[ir] = next_module if ir == "cubin" else str(next_module)
         if ir == "llir" and "shared" not in metadata:
             metadata["shared"] = _triton.get_shared_memory_size(module)
         if ir == "ptx":
@@ -2038,9 +2221,9 @@ def compile(fn, **kwargs):
     return CompiledKernel(fn, so_path, metadata, asm)
 
 
-@static_vars(discovered_gfx_arch_fulldetails=get_amdgpu_arch_fulldetails())
+@static_vars(discovered_gfx_arch_fulldetails=get_amdgpu_arch_fulldetails() if _is_hip else None)
 def _get_amdgcn_bitcode_paths():
-    if torch.version.hip is not None:
+    if _is_hip:
         gpu_arch_agnostic_bitcode_libraries = ["opencl.bc",
                                                "ocml.bc",
                                                "ockl.bc",
@@ -2077,7 +2260,25 @@ def get_amdgcn_bitcode_paths():
     return get_amdgcn_bitcode_paths.amdgcn_bitcode_paths
 
 
+# extension modules that were already loaded, by path; e.g., kernels that share an
+# argument signature share a launcher
+_loaded_modules = dict()
+
+
+def _load_module(name, so_path):
+    mod = _loaded_modules.get(so_path)
+    if mod is None:
+        import importlib.util
+        spec = importlib.util.spec_from_file_location(name, so_path)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        _loaded_modules[so_path] = mod
+    return mod
+
+
 class CompiledKernel:
+    __slots__ = ("fn", "_c_wrapper", "shared", "num_warps", "num_stages", "constants", "asm", "metadata",
+                 "cu_module", "cu_function", "n_regs", "n_spills", "sass")
 
     # Hooks for external tools to monitor the execution of triton kernels
     launch_enter_hook = None
@@ -2085,12 +2286,8 @@ class CompiledKernel:
 
     def __init__(self, fn, so_path, metadata, asm):
         # initialize launcher
-        import importlib.util
-        spec = importlib.util.spec_from_file_location("__triton_launcher", so_path)
-        mod = importlib.util.module_from_spec(spec)
         self.fn = fn
-        spec.loader.exec_module(mod)
-        self.c_wrapper = getattr(mod, "launch")
+        self._c_wrapper = getattr(_load_module("__triton_launcher", so_path), "launch")
         # initialize metadata
         self.shared = metadata["shared"]
         self.num_warps = metadata["num_warps"]
@@ -2109,13 +2306,13 @@ class CompiledKernel:
         if self.cu_module is not None:
             return
         device = triton.runtime.jit.get_current_device()
-        if torch.version.hip is not None:
+        if _is_hip:
             global hip_utils
             init_hip_utils()
             max_shared = hip_utils.get_device_properties(device)["max_shared_mem"]
             if self.shared > max_shared:
                 raise OutOfResources(self.shared, max_shared, "shared memory")
-            mod, func, n_regs, n_spills = hip_utils.load_binary(self.metadata["name"], self.asm["hsaco_path"], self.shared, device)
+            mod, func, n_regs, n_spills = hip_utils.load_binary(self.metadata["name"], Path(self.asm["hsaco_path"]).read_bytes(), self.shared, device)
         else:
             global cuda_utils
             init_cuda_utils()
@@ -2129,19 +2326,21 @@ class CompiledKernel:
         self.cu_module = mod
         self.cu_function = func
 
-    def __getattribute__(self, name):
-        if name == 'c_wrapper':
-            self._init_handles()
-        return super().__getattribute__(name)
+    # accessing the launcher initializes the module/function handles it needs
+    @property
+    def c_wrapper(self):
+        self._init_handles()
+        return self._c_wrapper
 
     def __getitem__(self, grid):
         self._init_handles()
+        # bind the leading launch parameters once; the hooks are read per launch since they can be reset at any time
+        launch = functools.partial(self._c_wrapper, grid[0], grid[1], grid[2], self.num_warps, self.shared)
 
         def runner(*args, stream=None):
             if stream is None:
                 stream = triton.runtime.jit.get_cuda_stream()
-            self.c_wrapper(grid[0], grid[1], grid[2], self.num_warps, self.shared, stream, self.cu_function,
-                           CompiledKernel.launch_enter_hook, CompiledKernel.launch_exit_hook, self, *args)
+            launch(stream, self.cu_function, CompiledKernel.launch_enter_hook, CompiledKernel.launch_exit_hook, self, *args)
         return runner
 
     def get_sass(self, fun=None):
@@ -2158,16 +2357,7 @@ class CompiledKernel:
         return self.sass
 
 
-class CudaUtils(object):
-
-    def __new__(cls):
-        if not hasattr(cls, 'instance'):
-            cls.instance = super(CudaUtils, cls).__new__(cls)
-        return cls.instance
-
-    @staticmethod
-    def _generate_src():
-        return """
+_cuda_utils_src = """
         #include <cuda.h>
 
         #include \"cuda.h\"
@@ -2227,12 +2417,21 @@ class CudaUtils(object):
             if(!PyArg_ParseTuple(args, "ss#ii", &name, &data, &data_size, &shared, &device)) {
                 return NULL;
             }
+            // PTX would be JIT-compiled by the driver on every load, only accept cubins (ELF images)
+            if(data_size < 4 || memcmp(data, "\\x7f" "ELF", 4) != 0) {
+              PyErr_SetString(PyExc_ValueError, "load_binary expects a cubin");
+              return NULL;
+            }
             CUfunction fun;
             CUmodule mod;
             int32_t n_regs = 0;
             int32_t n_spills = 0;
-            // create driver handles
-            CUDA_CHECK(cuModuleLoadData(&mod, data));
+            // create driver handles; loading may take a while, let other threads run meanwhile
+            CUresult load_status;
+            Py_BEGIN_ALLOW_THREADS;
+            load_status = cuModuleLoadData(&mod, data);
+            Py_END_ALLOW_THREADS;
+            CUDA_CHECK(load_status);
             CUDA_CHECK(cuModuleGetFunction(&fun, mod, name));
             // get allocated registers and spilled registers from the function
             CUDA_CHECK(cuFuncGetAttribute(&n_regs, CU_FUNC_ATTRIBUTE_NUM_REGS, fun));
@@ -2242,9 +2441,9 @@ class CudaUtils(object):
             int shared_optin;
             CUDA_CHECK(cuDeviceGetAttribute(&shared_optin, CU_DEVICE_ATTRIBUTE_MAX_SHARED_MEMORY_PER_BLOCK_OPTIN, device));
             if (shared > 49152 && shared_optin > 49152) {
-              CUDA_CHECK(cuFuncSetCacheConfig(fun, CU_FUNC_CACHE_PREFER_SHARED));
-              int shared_total, shared_static;
-              CUDA_CHECK(cuDeviceGetAttribute(&shared_total, CU_DEVICE_ATTRIBUTE_MAX_SHARED_MEMORY_PER_MULTIPROCESSOR, device));
+              // opting in beyond 48KB implies Volta+, where the carveout is what selects the L1/shared split
+              CUDA_CHECK(cuFuncSetAttribute(fun, CU_FUNC_ATTRIBUTE_PREFERRED_SHARED_MEMORY_CARVEOUT, CU_SHAREDMEM_CARVEOUT_MAX_SHARED));
+              int shared_static;
               CUDA_CHECK(cuFuncGetAttribute(&shared_static, CU_FUNC_ATTRIBUTE_SHARED_SIZE_BYTES, fun));
               CUDA_CHECK(cuFuncSetAttribute(fun, CU_FUNC_ATTRIBUTE_MAX_DYNAMIC_SHARED_SIZE_BYTES, shared_optin - shared_static));
             }
@@ -2279,25 +2478,37 @@ class CudaUtils(object):
         }
         """
 
+
+class CudaUtils(object):
+
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(CudaUtils, cls).__new__(cls)
+        return cls.instance
+
     def __init__(self):
-        src = self._generate_src()
-        key = hashlib.md5(src.encode("utf-8")).hexdigest()
+        # __init__ runs again each time the singleton is requested
+        if hasattr(self, "load_binary"):
+            return
+        src = _cuda_utils_src
+        key = hashlib.blake2b((src + _ext_suffix).encode("utf-8"), digest_size=16).hexdigest()
         cache = CacheManager(key)
         fname = "cuda_utils.so"
         if not cache.has_file(fname):
-            with tempfile.TemporaryDirectory() as tmpdir:
-                src_path = os.path.join(tmpdir, "main.c")
-                with open(src_path, "w") as f:
-                    f.write(src)
-                so = _build("cuda_utils", src_path, tmpdir)
-                with open(so, "rb") as f:
-                    cache.put(f.read(), fname, binary=True)
-        import importlib.util
-        spec = importlib.util.spec_from_file_location("cuda_utils", cache._make_path(fname))
-        mod = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        self.load_binary = mod.load_binary
-        self.get_device_properties = mod.get_device_properties
+            # concurrent processes would all build the module: one builds it, the others wait for it
+            with FileLock(cache._make_path(f"{fname}.lock")):
+                if not cache.has_file(fname):
+                    with tempfile.TemporaryDirectory() as tmpdir:
+                        src_path = os.path.join(tmpdir, "main.c")
+                        with open(src_path, "w") as f:
+                            f.write(src)
+                        so = _build("cuda_utils", src_path, tmpdir)
+                        cache.put_file(so, fname)
+        mod = _load_module("cuda_utils", cache._make_path(fname))
+        # modules are never unloaded, so a binary already loaded on a device can be handed out again
+        self.load_binary = functools.lru_cache(maxsize=None)(mod.load_binary)
+        # device properties are constant for the lifetime of the process
+        self.get_device_properties = functools.lru_cache(maxsize=None)(mod.get_device_properties)
 
 
 def init_cuda_utils():
@@ -2318,14 +2529,7 @@ def init_hip_utils():
 hip_utils = None
 
 
-class HIPUtils(object):
-    def __new__(cls):
-        if not hasattr(cls, 'instance'):
-            cls.instance = super(HIPUtils, cls).__new__(cls)
-        return cls.instance
-
-    def _generate_src(self):
-        return """
+_hip_utils_src = """
         #define __HIP_PLATFORM_AMD__
         #include <hip/hip_runtime.h>
         #define PY_SSIZE_T_CLEAN
@@ -2368,24 +2572,10 @@ class HIPUtils(object):
             Py_ssize_t data_size;
             int shared;
             int device;
-            if (!PyArg_ParseTuple(args, "ss#ii", &name, &data, &data_size, &shared, &device)) {
+            if (!PyArg_ParseTuple(args, "sy#ii", &name, &data, &data_size, &shared, &device)) {
                 return NULL;
             }
 
-            // Open HSACO file
-            FILE* hsaco_file;
-            if ((hsaco_file = fopen(data, "rb")) == NULL) {
-                return NULL;
-            }
-
-            // Read HSCAO file into Buffer
-            fseek(hsaco_file, 0L, SEEK_END);
-            size_t hsaco_file_size = ftell(hsaco_file);
-            unsigned char* hsaco = (unsigned char*) malloc(hsaco_file_size * sizeof(unsigned char));
-            rewind(hsaco_file);
-            fread(hsaco, sizeof(unsigned char), hsaco_file_size, hsaco_file);
-            fclose(hsaco_file);
-
             // set HIP options
             hipJitOption opt[] = {hipJitOptionErrorLogBufferSizeBytes, hipJitOptionErrorLogBuffer,
                                   hipJitOptionInfoLogBufferSizeBytes, hipJitOptionInfoLogBuffer,
@@ -2401,13 +2591,20 @@ class HIPUtils(object):
             // launch HIP Binary
             hipModule_t mod;
             hipFunction_t fun;
-            hipModuleLoadDataEx(&mod, hsaco, 5, opt, optval);
-            hipModuleGetFunction(&fun, mod, name);
-            free(hsaco);
+            // loading may take a while, let other threads run meanwhile
+            hipError_t load_status;
+            Py_BEGIN_ALLOW_THREADS;
+            load_status = hipModuleLoadDataEx(&mod, data, 5, opt, optval);
+            Py_END_ALLOW_THREADS;
+            HIP_CHECK(load_status);
+            HIP_CHECK(hipModuleGetFunction(&fun, mod, name));
 
             // get allocated registers and spilled registers from the function
             int n_regs = 0;
             int n_spills = 0;
+            HIP_CHECK(hipFuncGetAttribute(&n_regs, HIP_FUNC_ATTRIBUTE_NUM_REGS, fun));
+            HIP_CHECK(hipFuncGetAttribute(&n_spills, HIP_FUNC_ATTRIBUTE_LOCAL_SIZE_BYTES, fun));
+            n_spills /= 4;
             if (PyErr_Occurred()) {
               return NULL;
             }
@@ -2438,22 +2635,33 @@ class HIPUtils(object):
         }
         """
 
+
+class HIPUtils(object):
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(HIPUtils, cls).__new__(cls)
+        return cls.instance
+
     def __init__(self):
-        src = self._generate_src()
-        key = hashlib.md5(src.encode("utf-8")).hexdigest()
+        # __init__ runs again each time the singleton is requested
+        if hasattr(self, "load_binary"):
+            return
+        src = _hip_utils_src
+        key = hashlib.blake2b((src + _ext_suffix).encode("utf-8"), digest_size=16).hexdigest()
         cache = CacheManager(key)
         fname = "hip_utils.so"
         if not cache.has_file(fname):
-            with tempfile.TemporaryDirectory() as tmpdir:
-                src_path = os.path.join(tmpdir, "main.c")
-                with open(src_path, "w") as f:
-                    f.write(src)
-                so = _build("hip_utils", src_path, tmpdir)
-                with open(so, "rb") as f:
-                    cache.put(f.read(), fname, binary=True)
-        import importlib.util
-        spec = importlib.util.spec_from_file_location("hip_utils", cache._make_path(fname))
-        mod = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        self.load_binary = mod.load_binary
-        self.get_device_properties = mod.get_device_properties
+            # concurrent processes would all build the module: one builds it, the others wait for it
+            with FileLock(cache._make_path(f"{fname}.lock")):
+                if not cache.has_file(fname):
+                    with tempfile.TemporaryDirectory() as tmpdir:
+                        src_path = os.path.join(tmpdir, "main.c")
+                        with open(src_path, "w") as f:
+                            f.write(src)
+                        so = _build("hip_utils", src_path, tmpdir)
+                        cache.put_file(so, fname)
+        mod = _load_module("hip_utils", cache._make_path(fname))
+        # modules are never unloaded, so a binary already loaded on a device can be handed out again
+        self.load_binary = functools.lru_cache(maxsize=None)(mod.load_binary)
+        # device properties are constant for the lifetime of the process
+        self.get_device_properties = functools.lru_cache(maxsize=None)(mod.get_device_properties)
@@ -351,6 +351,7 @@ def {self.fn.__name__}({', '.join(self.arg_names)}, grid, num_warps=4, num_stage
         # cache of just-in-time compiled kernels
         self.cache = defaultdict(dict)
         self.hash = None
+        self.parsed_src = None
         # JITFunction can be instantiated as kernel
         # when called with a grid using __getitem__
         self.kernel_decorators = []
@@ -386,12 +387,15 @@ def {self.fn.__name__}({', '.join(self.arg_names)}, grid, num_warps=4, num_stage
     # we do not parse `src` in the constructor because
     # the user might want to monkey-patch self.src dynamically.
     # Our unit tests do this, for example.
+    # The AST is cached until `src` changes; callers must not mutate it.
     def parse(self):
-        tree = ast.parse(self.src)
-        assert isinstance(tree, ast.Module)
-        assert len(tree.body) == 1
-        assert isinstance(tree.body[0], ast.FunctionDef)
-        return tree
+        if self.parsed_src is None:
+            tree = ast.parse(self.src)
+            assert isinstance(tree, ast.Module)
+            assert len(tree.body) == 1
+            assert isinstance(tree.body[0], ast.FunctionDef)
+            self.parsed_src = tree
+        return self.parsed_src
 
     def __call__(self, *args, **kwargs):
         raise RuntimeError("Cannot call @triton.jit'd outside of the scope of a kernel")
@@ -402,10 +406,11 @@ def {self.fn.__name__}({', '.join(self.arg_names)}, grid, num_warps=4, num_stage
         if name == 'kernel_decorators':
             self.kernel = None
         super(JITFunction, self).__setattr__(name, value)
-        # - when `.src` attribute is set, cache path needs
-        #   to be reinitialized
+        # - when `.src` attribute is set, cache path and
+        #   parsed AST need to be reinitialized
         if name == 'src':
             self.hash = None
+            self.parsed_src = None
 
     def __repr__(self):
         return f"JITFunction({self.module}:{self.fn.__name__})"